@@ -14,16 +14,11 @@ void initialize_controller_default(Controller* controller) {
     controller->avoid_supress_time = 0.5; 
     controller->num_sensors = 4; 
 
-    controller->sonar_radian_offsets = malloc(controller->num_sensors * sizeof(int)); 
     controller->sonar_radian_offsets[0] = 0; 
     controller->sonar_radian_offsets[1] = 90; 
     controller->sonar_radian_offsets[2] = 180; 
     controller->sonar_radian_offsets[3] = 270; 
 
-    controller->sonar_basis_vectors = (double **) malloc(4 * sizeof(double *));
-    for (int i = 0; i < 4; i++) {
-        controller->sonar_basis_vectors[i] = (double *) malloc(2 * sizeof(double));
-    }
     controller->sonar_basis_vectors[0][0] = 0;
     controller->sonar_basis_vectors[0][1] = 1;
 
@@ -33,103 +28,63 @@ void initialize_controller_default(Controller* controller) {
     controller->sonar_basis_vectors[2][0] = 0;
     controller->sonar_basis_vectors[2][1] = -1;
 
-    controller->sonar_basis_vectors[2][0] = -1;
-    controller->sonar_basis_vectors[2][1] = 0;
-
-    controller->previous_wander = malloc(2 * sizeof(double)); 
-    initialize_to_zeros(controller->previous_wander, 2); 
-
-    controller->previous_heading = malloc(2 * sizeof(double)); 
-    controller->previous_heading[0] = 0.0; 
-    controller->previous_heading[1] = 1.0; 
-
-    controller->previous_avoid_heading = malloc(2 * sizeof(double)); 
-    initialize_to_zeros(controller->previous_avoid_heading, 2); 
+    controller->sonar_basis_vectors[3][0] = -1;
+    controller->sonar_basis_vectors[3][1] = 0;
 
-    controller->previous_time = 0.0f; 
-    controller->previous_wander_time = -10.0f; 
     controller->wander_period = 6; 
-}
 
-void free_controller(Controller* controller){
-    for (int i = 0; i < 4; i++) {
-        free(controller->sonar_basis_vectors[i]);
-    }
-    printf("freed sonar_basis_vectors rows"); 
-    free(controller->sonar_basis_vectors);
-    printf("freed sonar_basis_vectors entirely"); 
-    free(controller->sonar_radian_offsets); 
-    printf("freed sonar_radian_offsets"); 
-    free(controller->previous_wander); 
-    printf("freed previous_wander"); 
-    free(controller->previous_avoid_heading); 
-    printf("freed previous_avoid_heading"); 
-    free(controller->previous_heading); 
+    reset(controller); 
 }
 
-double* feel_force(Controller* controller, double* distances) { 
-    /* Computes the (repulsive) force from the measured sensor distances. 
+void feel_force(Controller* controller, const double* distances, double* overall_force) { 
+    /* Computes the (repulsive) force from the measured sensor distances, writing it into overall_force. 
 
     Parameters 
     ----------
-    double* distances 
+    const double* distances 
         array of distance measurements (assumed to have length equal to this->num_sensors). 
+    double* overall_force 
+        caller-owned output buffer of length 2. 
     */
-    size_t num_sensors = controller->num_sensors;
+    // num_sensors is a writable field; never index past the fixed-size arrays 
+    size_t num_sensors = (controller->num_sensors < 0) ? 0 : (size_t) controller->num_sensors;
+    if (num_sensors > MAX_SENSORS) num_sensors = MAX_SENSORS; 
 
-    double* overall_force = malloc(2 * sizeof(double)); 
     initialize_to_zeros(overall_force, 2); 
-    double force_per_sensor[num_sensors]; 
+    double force_per_sensor[MAX_SENSORS]; 
 
     for (int i=0; i < num_sensors; ++i) force_per_sensor[i] = -0.001 / pow((distances[i] + 0.001), 5); 
     for (int i=0; i < num_sensors; ++i) {
         for (int j=0; j < 2; ++j) overall_force[j] += controller->sonar_basis_vectors[i][j] * force_per_sensor[i]; 
     }
-    return overall_force; 
 }
 
-bool collide(Controller* controller, double* distances) {
+bool collide(Controller* controller, const double* distances) {
     // Note: assumes that the first index of distances holds the sensor with 0 offset 
     int front_facing_index = 0; 
     return distances[front_facing_index] < controller->collide_distance_threshold; 
 }
 
-double* runaway(Controller* controller, double* force) {
-    if (norm(force, 2) > controller->runaway_force_threshold) return force; 
-    double* zeros = malloc(2 * sizeof(double)); 
-    initialize_to_zeros(zeros, 2); 
-    return zeros;
+void runaway(Controller* controller, const double* force, double* heading) {
+    if (norm(force, 2) > controller->runaway_force_threshold) {
+        for (int i=0; i < 2; ++i) heading[i] = force[i]; 
+        return; 
+    }
+    initialize_to_zeros(heading, 2); 
 }
 
-double* wander(Controller* controller) {
-    double* wander_force_normalized = malloc(2 * sizeof(double)); 
-    double* wander_force = malloc(2 * sizeof(double)); 
-
-    initialize_to_zeros(wander_force_normalized, 2); 
-    initialize_to_zeros(wander_force, 2); 
-
+void wander(Controller* controller, double* wander_force) {
     for (int j=0; j < 2; ++j) wander_force[j] = (((double)rand()/(double)RAND_MAX) * 2.0) - 1.0; 
 
-    // for (int i=0; i < 2; ++i) {
-    //     wander_heading[i] = controller->previous_wander[i] + random_direction[i]; 
-    // }
-
-    // double wander_heading_norm = norm(wander_heading, 2); 
-
     double wander_force_norm = norm(wander_force, 2); 
 
-    for (int i=0; i < 2; ++i) wander_force_normalized[i] = wander_force[i] / wander_force_norm; 
-
-    controller->previous_wander = wander_force_normalized; 
-
-    free(wander_force); 
-    return wander_force_normalized; 
+    for (int i=0; i < 2; ++i) {
+        wander_force[i] = wander_force[i] / wander_force_norm; 
+        controller->previous_wander[i] = wander_force[i]; 
+    }
 }
 
-double* avoid(Controller* controller, double* avoid_force, double* wander_force) {
-    double* combined = malloc(2 * sizeof(double)); 
-    initialize_to_zeros(combined, 2); 
-
+void avoid(Controller* controller, const double* avoid_force, const double* wander_force, double* combined) {
     for (int i=0; i < 2; ++i) combined[i] = avoid_force[i] + wander_force[i]; 
 
     double combined_norm = norm(combined, 2); 
@@ -137,16 +92,22 @@ double* avoid(Controller* controller, double* avoid_force, double* wander_force)
     if (combined_norm > controller->significant_force_threshold) {
         combined[0] = combined[0] / combined_norm; 
         combined[1] = combined[1] / combined_norm; 
-        return combined; 
+        return; 
     }
 
-    double* zeros = malloc(2 * sizeof(double)); 
-    initialize_to_zeros(zeros, 2); 
-    return zeros;
+    initialize_to_zeros(combined, 2); 
 }
+
 void reset(Controller* controller) {
+    /* Restores the behavioral state to its initial value; parameters are left unchanged. */
+    initialize_to_zeros(controller->previous_wander, 2); 
+    initialize_to_zeros(controller->previous_avoid_heading, 2); 
+
     controller->previous_heading[0] = 0.0; 
-    controller->previous_heading[1] = 0.0; 
+    controller->previous_heading[1] = 1.0; 
+
+    controller->previous_time = 0.0f; 
+    controller->previous_wander_time = -10.0f; 
 }
 
 void discretize(double* direction, size_t size) {
@@ -177,28 +138,37 @@ void discretize(double* direction, size_t size) {
     else if (direction[1] < (-1. + pi_over_8)) direction[1] = -1.; 
 }
 
-double* call(Controller* controller, double* distances, double time) {
+void step(Controller* controller, const double* distances, double time, double* avoid_force, double* wander_force, double* velocity) {
+    /* Runs one full control step (feel, wander, avoid, discretize) without allocating. 
+
+    Parameters 
+    ----------
+    const double* distances 
+        array of distance measurements (assumed to have length equal to this->num_sensors). 
+    double time 
+        current time [s]. 
+    double* avoid_force, double* wander_force, double* velocity 
+        caller-owned output buffers of length 2; velocity receives the discretized heading. 
+    */
     // get raw repulsive force (sum over sensors)
-    double* avoid_force = feel_force(controller, distances); 
-    double* wander_force; 
+    feel_force(controller, distances, avoid_force); 
 
     // generate new wander force (normalized) every wander period 
     if ((time - controller->previous_wander_time) >= controller->wander_period) {
-        wander_force = wander(controller); 
+        wander(controller, wander_force); 
         controller->previous_wander_time = time; 
     } else {
-        wander_force = malloc(2 * sizeof(double)); 
-        initialize_to_zeros(wander_force, 2); 
+        // default wander is to go straight 
+        wander_force[0] = 0.0; 
+        wander_force[1] = 1.0; 
     }
 
     // combine wander and avoid forces 
-    double* desired_velocity = avoid(controller, avoid_force, wander_force); 
+    avoid(controller, avoid_force, wander_force, velocity); 
 
-    free(wander_force); 
-
-    controller->previous_heading[0] = desired_velocity[0]; 
-    controller->previous_heading[1] = desired_velocity[1]; 
+    controller->previous_heading[0] = velocity[0]; 
+    controller->previous_heading[1] = velocity[1]; 
     controller->previous_time = time; 
-    free(avoid_force); 
-    return desired_velocity; 
+
+    discretize(velocity, 2); 
 }
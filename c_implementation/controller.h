@@ -2,6 +2,9 @@
 #define CONTROLLER_H 
 
 #include <stdbool.h> 
+#include <stddef.h> 
+
+#define MAX_SENSORS 4
 
 typedef struct {
     // parameters 
@@ -12,9 +15,9 @@ typedef struct {
 
     // behavioral state (historical)
     double previous_wander_time; 
-    double* previous_avoid_heading; 
-    double* previous_heading; 
-    double* previous_wander; 
+    double previous_avoid_heading[2]; 
+    double previous_heading[2]; 
+    double previous_wander[2]; 
     double previous_time; 
 
     // scheduling 
@@ -22,21 +25,21 @@ typedef struct {
 
     // sensors
     int num_sensors; 
-    int* sonar_radian_offsets; 
-    double** sonar_basis_vectors; 
+    int sonar_radian_offsets[MAX_SENSORS]; 
+    double sonar_basis_vectors[MAX_SENSORS][2]; 
 } Controller; 
 
-// Controller private methods 
-double* feel_force(Controller*, double*); 
-bool collide(Controller*, double*); 
-double* runaway(Controller*, double*); 
-double* wander(Controller*); 
-double* avoid(Controller*, double*, double*); 
+// Controller private methods (results are written to the caller-provided output buffer)
+void feel_force(Controller*, const double*, double*); 
+bool collide(Controller*, const double*); 
+void runaway(Controller*, const double*, double*); 
+void wander(Controller*, double*); 
+void avoid(Controller*, const double*, const double*, double*); 
 
 // Public API 
 void initialize_controller_default(Controller*); 
-void free_controller(Controller*); 
 void reset(Controller*); 
-double* call(Controller*, double*, double); 
+void discretize(double*, size_t); 
+void step(Controller*, const double*, double, double*, double*, double*); 
 
 #endif
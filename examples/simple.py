@@ -6,7 +6,10 @@ import numpy as np
 
 from custom_logging import setup_logger
 from environment import Environment, BoxEnvironment, CompositeEnvironment
+from replay import record
+from scenario import Scenario, load_scenario
 from simulation import Simulator
+from telemetry import TelemetryWriter
 from vehicle import Vehicle, SimpleCar
 from typedefs import namespace
 from utils import setup_experiment_directory, get_now_str
@@ -16,34 +19,64 @@ parser = argparse.ArgumentParser()
 # use c implementation 
 parser.add_argument("--use_c", action="store_true")
 
+# scenario file (overrides the hard-coded room and vehicle below; --use_c switches every vehicle to the c controller)
+parser.add_argument("--scenario", type=str, default=None)
+
 # visuals
 parser.add_argument("--save_animation", action="store_true")
 parser.add_argument("--num_steps", type=int, default=500)
+parser.add_argument("--telemetry", action="store_true") # attach a viewer with `python src/telemetry.py <name>`
+
+# controller traces 
+parser.add_argument("--record_trace", action="store_true")
 
 def main(args: namespace): 
     # logging 
     experiment_directory: os.PathLike = setup_experiment_directory("avoid")
     log = setup_logger(__name__, custom_handle=os.path.join(experiment_directory, "log.out"))
 
-    # configure the environment geometry 
-    wall_length: float = 2.0 # [m]
-    obstacles: Sequence[BoxEnvironment] = [BoxEnvironment(0.5)]
-    obstacle_locations: np.ndarray = np.array([
-        [0.5, 0.0]
-    ])
-    room: Environment = CompositeEnvironment(obstacles, obstacle_locations, wall_length)
-    # room: Environment = BoxEnvironment(wall_length)
-    log.info(f"Environment: {room}")
-
-    # configure the vehicle 
-    vehicle: Vehicle = SimpleCar(use_c_controller=args.use_c)
-    log.info("configured vehicle")
-
-    # set up the simulator 
-    simulator: Simulator = Simulator(room, vehicle, experiment_directory)
-    log.info("configured simulator")
-
-    simulator.simulate(args.num_steps, save_artifacts=args.save_animation)
+    if args.scenario is not None: 
+        scenario: Scenario = load_scenario(args.scenario, use_c_controller=(True if args.use_c else None))
+        log.info(f"loaded scenario {args.scenario}: environment {scenario.environment}")
+
+        simulator: Simulator = scenario.simulator(experiment_directory)
+        args.num_steps = scenario.num_steps
+        log.info("configured simulator")
+    else: 
+        # configure the environment geometry 
+        wall_length: float = 2.0 # [m]
+        obstacles: Sequence[BoxEnvironment] = [BoxEnvironment(0.5)]
+        obstacle_locations: np.ndarray = np.array([
+            [0.5, 0.0]
+        ])
+        room: Environment = CompositeEnvironment(obstacles, obstacle_locations, wall_length)
+        # room: Environment = BoxEnvironment(wall_length)
+        log.info(f"Environment: {room}")
+
+        # configure the vehicle 
+        vehicle: Vehicle = SimpleCar(use_c_controller=args.use_c)
+        log.info("configured vehicle")
+
+        # set up the simulator 
+        simulator: Simulator = Simulator(room, vehicle, experiment_directory)
+        log.info("configured simulator")
+
+    if args.telemetry: 
+        simulator.telemetry = TelemetryWriter()
+        log.info(f"publishing telemetry to shared memory block {simulator.telemetry.name}")
+
+    # a collision ends the run with a ValueError; release the telemetry block either way 
+    try: 
+        if args.record_trace: 
+            trace_path: os.PathLike = os.path.join(experiment_directory, "trace.npz")
+            trace, = record(simulator, args.num_steps, save_artifacts=args.save_animation)
+            trace.save(trace_path)
+            log.info(f"saved controller trace to {trace_path}")
+        else: 
+            simulator.simulate(args.num_steps, save_artifacts=args.save_animation)
+    finally: 
+        if args.telemetry: 
+            simulator.telemetry.close()
 
     if args.save_animation:
         log.info("animating simulation history")
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 import ctypes 
 import os 
+import sysconfig
 from typing import Optional, List, Tuple
 
 import numpy as np 
@@ -8,7 +9,29 @@ import numpy as np
 from typedefs import ndarray
 from utils import PROJECT_DIRECTORY
 
+def discretize(direction: ndarray) -> ndarray: 
+    """Python reference for `discretize` in c_implementation/controller.c: normalizes 
+    `direction` (..., 2) and snaps each component to 0, +-pi/4 or +-1, with the same 
+    (asymmetric) interval boundaries as the C code. 
+    """
+    pi_over_4, pi_over_8 = np.pi / 4., np.pi / 8.
+    magnitude: ndarray = np.linalg.norm(direction, axis=-1, keepdims=True)
+    unit: ndarray = np.divide(direction, magnitude, out=np.array(direction, dtype=float), where=(magnitude > 0.))
+
+    positive: ndarray = np.select([unit < pi_over_8, unit <= 1. - pi_over_8], [0., pi_over_4], 1.)
+    negative: ndarray = np.select(
+        [unit > -pi_over_8, (unit < -pi_over_8) & (unit > -1. + pi_over_8), unit < -1. + pi_over_8], 
+        [0., -pi_over_4, -1.], 
+        unit, 
+    )
+    return np.where(unit >= 0., positive, negative)
+
 class HCS04Controller(ABC): 
+    # whether to append per-call forces to the (unbounded) history lists used for animation
+    record_history: bool = True 
+    # whether to print per-call debug output (formatting it dominates the cost of a call)
+    verbose: bool = True 
+
     def register_headings(self, headings: ndarray) -> None: 
         self.headings: ndarray = headings
 
@@ -66,7 +89,6 @@ class AvoidingController(HCS04Controller):
 
 class Creature(HCS04Controller):
     def __init__(self):
-        self.prev_wander_time: float = -10.0
         self.wander_period: float = 6.0
         self.sonar_radian_offsets: np.ndarray = np.array([0, np.pi/2, np.pi, 3*np.pi/2])
         self.num_sensors: int = 2
@@ -75,15 +97,7 @@ class Creature(HCS04Controller):
         self.runaway_force_threshold: float = 0.1
         self.significant_force_threshold: float = 0.0
         self.avoid_supress_time: float = 0.5
-        self.prev_avoid_heading: np.ndarray = np.zeros(2)
-        self.prev_heading: np.ndarray = np.array([0, 1])
-        self.prev_time: float = 0.0
-        self.prev_wander: np.ndarray = np.zeros(2)
-
-        self.avoid_history: List[np.ndarray] = []
-        self.wander_history: List[np.ndarray] = []
-        self.force_mag_history: List[np.ndarray] = []
-        self.force_history: List[np.ndarray] = []
+        self.reset()
 
     def _feel_force(self, distances: np.ndarray) -> np.ndarray:
         force_per_sensor: np.ndarray = -0.001 / (distances.reshape((-1,1))+ 0.001)**5
@@ -115,12 +129,22 @@ class Creature(HCS04Controller):
             return np.zeros(2)
 
     def reset(self) -> None:
-        self.prev_heading: ndarray = None
-        # TODO implement me to reset any state variables
-        pass
+        self.prev_wander_time: float = -10.0
+        self.prev_avoid_heading: np.ndarray = np.zeros(2)
+        self.prev_heading: np.ndarray = np.array([0, 1])
+        self.prev_time: float = 0.0
+        self.prev_wander: np.ndarray = np.zeros(2)
+        self.prev_force: np.ndarray = np.zeros(2)
+        self.prev_wander_force: np.ndarray = np.zeros(2)
+
+        self.avoid_history: List[np.ndarray] = []
+        self.wander_history: List[np.ndarray] = []
+        self.force_mag_history: List[np.ndarray] = []
+        self.force_history: List[np.ndarray] = []
 
     def __call__(self, distances: ndarray, time: float):
-        print(f"distances: {distances}\ttime: {time:0.4f}")
+        if self.verbose: 
+            print(f"distances: {distances}\ttime: {time:0.4f}")
         #halt: bool = self._collide(distances)
         # runaway_heading = self._runaway(force)
         #if np.linalg.norm(self.prev_heading) > 0 and halt:
@@ -130,10 +154,13 @@ class Creature(HCS04Controller):
         avoid_force: np.ndarray = self._feel_force(distances=distances)
 
         # -- record force and force magnitude
-        self.force_history.append(avoid_force)
-        self.force_mag_history.append(np.linalg.norm(avoid_force))
+        self.prev_force = avoid_force
+        if self.record_history: 
+            self.force_history.append(avoid_force)
+            self.force_mag_history.append(np.linalg.norm(avoid_force))
 
-        print(f"avoid force experienced: {avoid_force}")
+        if self.verbose: 
+            print(f"avoid force experienced: {avoid_force}")
 
         # -- generate new wander force (normalized) every wander period
         if time - self.prev_wander_time >= self.wander_period:
@@ -143,14 +170,17 @@ class Creature(HCS04Controller):
             # -- default wander is to go straight (i.e. prev wander heading is followed)
             wander_force = np.array([0, 1])
 
-        self.wander_history.append(wander_force)
+        self.prev_wander_force = wander_force
+        if self.record_history: 
+            self.wander_history.append(wander_force)
 
         # -- combine wander and avoid forces, round to zero if threshold magnitude is not exceeded
         # -- vector resulting from combining forces and normalizing is the final velocity
         velocity = self._avoid(avoid_force=avoid_force, wander_force=wander_force)
 
-        print(f"wander force: {wander_force}")
-        print(f"combined wander/avoid (velocity): {velocity}")
+        if self.verbose: 
+            print(f"wander force: {wander_force}")
+            print(f"combined wander/avoid (velocity): {velocity}")
             #self.prev_avoid_heading = avoid_heading
 
             # if (time - self.prev_wander_time) > self.avoid_supress_time:
@@ -166,6 +196,63 @@ class Creature(HCS04Controller):
         self.prev_time = time
         return velocity
 
+    def batch(self, distances: ndarray, times: ndarray) -> ndarray: 
+        """Equivalent to calling the controller on each row of `distances` (with the matching 
+        entry of `times`) in turn, but evaluated as whole-array operations and without debug 
+        output; wander draws consume numpy's global generator in the same order as the 
+        per-call path. 
+
+        Parameters 
+        ----------
+        distances: ndarray 
+            (num_calls, num_sensors) distance measurements. 
+        times: ndarray 
+            (num_calls,) call times. 
+
+        Returns 
+        -------
+        velocities: ndarray 
+            (num_calls, 2) velocity control signals. 
+        """
+        num_calls: int = times.size
+        if num_calls == 0: 
+            return np.zeros((0, 2))
+
+        avoid_forces: ndarray = (-0.001 / (distances + 0.001)**5) @ self.sonar_basis_vectors
+
+        # -- wander firing times depend only on the time stream 
+        fires: ndarray = np.zeros(num_calls, dtype=bool)
+        prev_wander_time: float = self.prev_wander_time
+        for i, time in enumerate(times): 
+            if time - prev_wander_time >= self.wander_period: 
+                fires[i] = True 
+                prev_wander_time = time
+
+        wander_forces: ndarray = np.tile(np.array([0., 1.]), (num_calls, 1))
+        draws: ndarray = np.random.uniform(-1, 1, (np.count_nonzero(fires), 2))
+        wander_forces[fires] = draws / np.linalg.norm(draws, axis=1, keepdims=True)
+
+        combined: ndarray = avoid_forces + wander_forces
+        magnitudes: ndarray = np.linalg.norm(combined, axis=1, keepdims=True)
+        velocities: ndarray = np.divide(combined, magnitudes, out=np.zeros_like(combined), where=(magnitudes > self.significant_force_threshold))
+
+        # -- leave the controller in the state the per-call path would have 
+        self.prev_wander_time = prev_wander_time
+        if np.any(fires): 
+            self.prev_wander = wander_forces[np.flatnonzero(fires)[-1]]
+        self.prev_force = avoid_forces[-1]
+        self.prev_wander_force = wander_forces[-1]
+        self.prev_heading = velocities[-1]
+        self.prev_time = times[-1]
+        if self.record_history: 
+            self.force_history.extend(avoid_forces)
+            self.force_mag_history.extend(np.linalg.norm(avoid_forces, axis=1))
+            self.wander_history.extend(wander_forces)
+
+        return velocities
+
+MAX_SENSORS: int = 4 # must match MAX_SENSORS in c_implementation/controller.h
+
 class CreatureC(ctypes.Structure): 
     _fields_: List[Tuple] = [
         ('collide_distance_threshold', ctypes.c_double), 
@@ -173,14 +260,14 @@ class CreatureC(ctypes.Structure):
         ('significant_force_threshold', ctypes.c_double), 
         ('avoid_supress_time', ctypes.c_double), 
         ('previous_wander_time', ctypes.c_double), 
-        ('previous_avoid_heading', ctypes.POINTER(ctypes.c_double * 2)), 
-        ('previous_heading', ctypes.POINTER(ctypes.c_double * 2)), 
-        ('previous_wander', ctypes.POINTER(ctypes.c_double * 2)), 
+        ('previous_avoid_heading', ctypes.c_double * 2), 
+        ('previous_heading', ctypes.c_double * 2), 
+        ('previous_wander', ctypes.c_double * 2), 
         ('previous_time', ctypes.c_double), 
         ('wander_period', ctypes.c_int), 
         ('num_sensors', ctypes.c_int), 
-        ('sonar_radian_offsets', ctypes.POINTER(ctypes.c_int * 4)), 
-        ('sonar_basis_vectors', ctypes.POINTER(ctypes.POINTER(ctypes.c_double * 2) * 4))
+        ('sonar_radian_offsets', ctypes.c_int * MAX_SENSORS), 
+        ('sonar_basis_vectors', (ctypes.c_double * 2) * MAX_SENSORS)
     ]
 
 class CreatureCInterface(HCS04Controller): 
@@ -189,6 +276,7 @@ class CreatureCInterface(HCS04Controller):
         self._initialize_shared_object()
         self.c_controller: ctypes.Structure = CreatureC()
         self.shared_object.initialize_controller_default(ctypes.byref(self.c_controller))
+        self._initialize_buffers()
 
         # state for rendering animations
         self.avoid_history: List[np.ndarray] = []
@@ -200,75 +288,82 @@ class CreatureCInterface(HCS04Controller):
     def prev_heading(self) -> np.ndarray: 
         return self.c_to_ndarray(self.c_controller.previous_heading)
 
+    @property 
+    def prev_force(self) -> np.ndarray: 
+        return self.c_to_ndarray(self.avoid_force_c)
+
+    @property 
+    def prev_wander_force(self) -> np.ndarray: 
+        return self.c_to_ndarray(self.wander_force_c)
+
     def __getstate__(self) -> dict: 
         state: dict = self.__dict__.copy()
-        del state["shared_object"]
-        del state["c_controller"]
+        for name in ("shared_object", "c_controller", "distances_c", "avoid_force_c", "wander_force_c", "velocity_c", "_distances", "_avoid_force", "_wander_force", "_velocity"): 
+            del state[name]
         return state
 
     def __setstate__(self, state: dict) -> None: 
         self.__dict__.update(state)
 
     def _initialize_shared_object(self) -> None: 
-        library_path: os.PathLike = os.path.join(PROJECT_DIRECTORY, "control_c.cpython-39-darwin.so")
+        library_path: os.PathLike = os.path.join(PROJECT_DIRECTORY, "control_c" + sysconfig.get_config_var("EXT_SUFFIX"))
         self.shared_object = ctypes.CDLL(library_path)
-        self.shared_object.feel_force.restype = ctypes.POINTER(ctypes.c_double * 2)
-        self.shared_object.avoid.restype = ctypes.POINTER(ctypes.c_double * 2)
-        self.shared_object.wander.restype = ctypes.POINTER(ctypes.c_double * 2)
-
-    def c_to_ndarray(self, pointer: ctypes.POINTER) -> np.ndarray: 
-        return np.array([value for value in pointer.contents])
-
-    def ndarray_to_c(self, ndarray: np.ndarray, as_ptr: Optional[bool]=True) -> ctypes.POINTER: 
-        ndarray_c = (ctypes.c_double * ndarray.size)()
-        ndarray_c[:] = ndarray
-        if as_ptr: 
-            ndarray_c_pointer = ctypes.cast(ndarray_c, ctypes.POINTER(ctypes.c_double))
-            return ndarray_c_pointer
-        else: 
-            return ndarray_c
+        self.shared_object.step.argtypes = [
+            ctypes.POINTER(CreatureC), 
+            ctypes.POINTER(ctypes.c_double), 
+            ctypes.c_double, 
+            ctypes.POINTER(ctypes.c_double), 
+            ctypes.POINTER(ctypes.c_double), 
+            ctypes.POINTER(ctypes.c_double), 
+        ]
+        self.shared_object.step.restype = None
+
+    def _initialize_buffers(self) -> None: 
+        # caller-owned buffers, reused on every call 
+        self.distances_c = (ctypes.c_double * self.c_controller.num_sensors)()
+        self.avoid_force_c = (ctypes.c_double * 2)()
+        self.wander_force_c = (ctypes.c_double * 2)()
+        self.velocity_c = (ctypes.c_double * 2)()
+
+        # numpy views onto the same memory, so calls convert nothing through ctypes
+        self._distances: np.ndarray = np.ctypeslib.as_array(self.distances_c)
+        self._avoid_force: np.ndarray = np.ctypeslib.as_array(self.avoid_force_c)
+        self._wander_force: np.ndarray = np.ctypeslib.as_array(self.wander_force_c)
+        self._velocity: np.ndarray = np.ctypeslib.as_array(self.velocity_c)
+
+    def c_to_ndarray(self, c_array: ctypes.Array) -> np.ndarray: 
+        return np.array(c_array[:])
 
     def __call__(self, distances: ndarray, time: float):
-        print(f"distances: {distances}\ttime: {time:0.4f}")
-        # -- get raw repulsive force (sum over sensors)
-        distances_c = (ctypes.c_double * 4)()
-        distances_c[:] = distances 
-        distances_c_pointer = ctypes.cast(distances_c, ctypes.POINTER(ctypes.c_double))
+        if self.verbose: 
+            print(f"distances: {distances}\ttime: {time:0.4f}")
+        self._distances[:] = distances 
 
-        avoid_force: np.ndarray = self.c_to_ndarray(self.shared_object.feel_force(ctypes.byref(self.c_controller), self.ndarray_to_c(distances)))
+        # -- feel, wander, avoid and discretize in a single native call
+        self.shared_object.step(ctypes.byref(self.c_controller), self.distances_c, time, self.avoid_force_c, self.wander_force_c, self.velocity_c)
 
         # -- record force and force magnitude
-        self.force_history.append(avoid_force)
-        self.force_mag_history.append(np.linalg.norm(avoid_force))
-
-        print(f"avoid force experienced: {avoid_force}")
-
-        # -- generate new wander force (normalized) every wander period
-        if time - self.c_controller.previous_wander_time >= self.c_controller.wander_period:
-            wander_force = self.c_to_ndarray(self.shared_object.wander(ctypes.byref(self.c_controller)))
-            self.c_controller.previous_wander_time = time
-        else:
-            # -- default wander is to go straight (i.e. prev wander heading is followed)
-            wander_force = np.array([0, 1])
-
-        self.wander_history.append(wander_force)
-
-        # -- combine wander and avoid forces, round to zero if threshold magnitude is not exceeded
-        # -- vector resulting from combining forces and normalizing is the final velocity
-        velocity = self.shared_object.avoid(ctypes.byref(self.c_controller), self.ndarray_to_c(avoid_force), self.ndarray_to_c(wander_force))
-        velocity_ndarray: np.ndarray = self.c_to_ndarray(velocity)
-
-        print(f"wander force: {wander_force}")
-        print(f"combined wander/avoid (velocity): {velocity_ndarray}")
-
-        self.c_controller.previous_heading = ctypes.pointer((ctypes.c_double * 2)(*velocity_ndarray))
-        self.c_controller.previous_time = time
-
-        self.shared_object.discretize(velocity, 2)
-        discretized_velocity: np.ndarray = self.c_to_ndarray(velocity)
-
-        print(f"discretized velocity: {discretized_velocity}")
+        if self.record_history: 
+            avoid_force: np.ndarray = self._avoid_force.copy()
+            self.force_history.append(avoid_force)
+            self.force_mag_history.append(np.linalg.norm(avoid_force))
+            self.wander_history.append(self._wander_force.copy())
+
+        discretized_velocity: np.ndarray = self._velocity.copy()
+
+        if self.verbose: 
+            print(f"avoid force experienced: {self._avoid_force}")
+            print(f"wander force: {self._wander_force}")
+            print(f"combined wander/avoid (velocity): {self.prev_heading}")
+            print(f"discretized velocity: {discretized_velocity}")
         return discretized_velocity
 
     def reset(self) -> None:
-        pass 
+        # resets the behavioral state in place, keeping the parameters
+        self.shared_object.reset(ctypes.byref(self.c_controller))
+        self.avoid_force_c[:] = (0., 0.)
+        self.wander_force_c[:] = (0., 0.)
+        self.avoid_history.clear()
+        self.wander_history.clear()
+        self.force_mag_history.clear()
+        self.force_history.clear()
@@ -0,0 +1,167 @@
+"""Controller-in-the-loop over a serial-like byte protocol.
+
+A device stand-in process hosts controllers (by default the compiled C controller, as
+it would run on the microcontroller) behind a local unix socket, one controller per
+connection. Each request frame is
+
+    uint8 num_sensors | float64 time | float64 distances[num_sensors]
+
+and each response frame is
+
+    float64 avoid_force[2] | float64 wander_force[2] | float64 heading[2] | float64 velocity[2]
+
+all little-endian. A request whose sensor count is `RESET_FRAME` (and whose distances are
+empty) resets the hosted controller instead, and has no response; frames are handled in
+order, so the next request sees the reset controller. `DeviceController` is the client side: its `__call__` is a coroutine,
+so an `AsyncSimulator` can interleave many vehicles while they wait on controller I/O.
+"""
+import argparse
+import asyncio
+import os
+import struct
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from control import HCS04Controller, Creature, CreatureCInterface
+from metrics import RunningMoments
+from typedefs import namespace, ndarray
+
+REQUEST_HEADER: struct.Struct = struct.Struct("<Bd")
+RESPONSE: struct.Struct = struct.Struct("<8d")
+RESET_FRAME: int = 255
+
+def encode_request(distances: ndarray, request_time: float) -> bytes:
+    return REQUEST_HEADER.pack(distances.size, request_time) + np.asarray(distances, dtype="<f8").tobytes()
+
+async def read_request(reader: asyncio.StreamReader) -> tuple:
+    """Returns `(distances, time)`, or `(None, time)` for a reset frame."""
+    num_sensors, request_time = REQUEST_HEADER.unpack(await reader.readexactly(REQUEST_HEADER.size))
+    if num_sensors == RESET_FRAME:
+        return None, request_time
+    distances: ndarray = np.frombuffer(await reader.readexactly(8 * num_sensors), dtype="<f8")
+    return distances, request_time
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, use_c: bool) -> None:
+    controller: HCS04Controller = CreatureCInterface() if use_c else Creature()
+    controller.record_history = False
+    controller.verbose = False
+
+    try:
+        while True:
+            distances, request_time = await read_request(reader)
+            if distances is None:
+                controller.reset()
+                continue
+            velocity: ndarray = controller(distances, request_time)
+            writer.write(RESPONSE.pack(*controller.prev_force, *controller.prev_wander_force, *controller.prev_heading, *velocity))
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(socket_path: os.PathLike, use_c: Optional[bool]=True) -> None:
+    server = await asyncio.start_unix_server(lambda reader, writer: handle_connection(reader, writer, use_c), path=socket_path)
+    async with server:
+        await server.serve_forever()
+
+def spawn_device(socket_path: os.PathLike, use_c: Optional[bool]=True, timeout: Optional[float]=10.) -> subprocess.Popen:
+    """Launches a device stand-in process listening on `socket_path` and waits until it is accepting connections."""
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    command: List[str] = [sys.executable, os.path.abspath(__file__), socket_path] + (["--use_c"] if use_c else [])
+    process: subprocess.Popen = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    deadline: float = time.monotonic() + timeout
+    while not os.path.exists(socket_path):
+        if (process.poll() is not None) or (time.monotonic() > deadline):
+            process.kill()
+            raise RuntimeError(f"device stand-in failed to start listening on {socket_path}")
+        time.sleep(0.01)
+
+    return process
+
+class DeviceController(HCS04Controller):
+    """Client for a controller hosted by a device stand-in; awaiting a call sends one request
+    frame and waits for the response, recording the round-trip latency.
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+        self.latency: RunningMoments = RunningMoments()
+        self.max_latency: float = 0.
+        self._reset_local()
+
+    def _reset_local(self) -> None:
+        self.prev_heading: ndarray = np.array([0., 1.])
+        self.prev_force: ndarray = np.zeros(2)
+        self.prev_wander_force: ndarray = np.zeros(2)
+
+        # state for rendering animations
+        self.avoid_history: List[np.ndarray] = []
+        self.wander_history: List[np.ndarray] = []
+        self.force_mag_history: List[np.ndarray] = []
+        self.force_history: List[np.ndarray] = []
+
+    @classmethod
+    async def connect(cls, socket_path: os.PathLike) -> "DeviceController":
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        return cls(reader, writer)
+
+    def __getstate__(self) -> dict:
+        state: dict = self.__dict__.copy()
+        del state["reader"]
+        del state["writer"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+
+    async def __call__(self, distances: ndarray, request_time: float) -> ndarray:
+        start: float = time.perf_counter()
+        self.writer.write(encode_request(distances, request_time))
+        await self.writer.drain()
+        response: tuple = RESPONSE.unpack(await self.reader.readexactly(RESPONSE.size))
+
+        latency: float = time.perf_counter() - start
+        self.latency.push(latency)
+        self.max_latency = max(self.max_latency, latency)
+
+        self.prev_force = np.array(response[0:2])
+        self.prev_wander_force = np.array(response[2:4])
+        self.prev_heading = np.array(response[4:6])
+        velocity: ndarray = np.array(response[6:8])
+
+        if self.record_history:
+            self.force_history.append(self.prev_force)
+            self.force_mag_history.append(np.linalg.norm(self.prev_force))
+            self.wander_history.append(self.prev_wander_force)
+
+        return velocity
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    def reset(self) -> None:
+        """Queues a reset frame (no round trip: the device handles frames in order, so the
+        next call is answered by the reset controller) and resets the local copies.
+        """
+        self.writer.write(REQUEST_HEADER.pack(RESET_FRAME, 0.))
+        self._reset_local()
+
+parser = argparse.ArgumentParser()
+parser.add_argument("socket_path", type=str)
+parser.add_argument("--use_c", action="store_true")
+
+def main(args: namespace):
+    asyncio.run(serve(args.socket_path, args.use_c))
+
+if __name__=="__main__":
+    args = parser.parse_args()
+    main(args)
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import dataclasses
+import os
 from typing import List, Optional, Sequence, Tuple
 
 import matplotlib.pyplot as plt
@@ -11,6 +12,44 @@ from typedefs import ndarray
 
 normalize: callable = lambda x: x / np.linalg.norm(x)
 
+def ray_intersections(ray_origin: ndarray, ray_directions: ndarray, endpoints: ndarray, wall_directions: Optional[ndarray]=None) -> ndarray: 
+    """Intersects the K rays leaving `ray_origin` along `ray_directions` with a set of W walls. 
+
+    Parameters 
+    ----------
+    ray_origin: ndarray 
+        2-vector shared by every ray. 
+    ray_directions: ndarray 
+        (K, 2) array of (not necessarily normalized) ray directions. 
+    endpoints: ndarray 
+        (W, 2, 2) array of wall endpoints. 
+    wall_directions: ndarray 
+        optional precomputed (W, 2) array of `endpoints[:, 1] - endpoints[:, 0]`. 
+
+    Returns 
+    -------
+    distances: ndarray 
+        (K,) array of the distance along each ray to the nearest wall, `np.inf` where a ray 
+        hits no wall (including rays parallel to every wall they would otherwise meet). 
+    """
+    v2: ndarray = endpoints[:, 1] - endpoints[:, 0] if wall_directions is None else wall_directions
+    v1: ndarray = ray_origin - endpoints[:, 0]
+
+    with np.errstate(divide="ignore", invalid="ignore"): 
+        directions: ndarray = ray_directions / np.linalg.norm(ray_directions, axis=-1, keepdims=True)
+
+        # -- v3 = (-d_y, d_x); the (K, W) denominators are v2 . v3 
+        denominator: ndarray = np.outer(directions[:, 0], v2[:, 1]) - np.outer(directions[:, 1], v2[:, 0])
+        cross: ndarray = v2[:, 0] * v1[:, 1] - v2[:, 1] * v1[:, 0]
+        along_wall: ndarray = np.outer(directions[:, 0], v1[:, 1]) - np.outer(directions[:, 1], v1[:, 0])
+
+        t1: ndarray = cross / denominator
+        t2: ndarray = along_wall / denominator
+
+    parallel: ndarray = np.abs(denominator) <= 1e-12 * np.linalg.norm(v2, axis=-1)
+    hit: ndarray = ~parallel & (t1 >= 0.) & (t2 >= 0.) & (t2 <= 1.)
+    return np.min(np.where(hit, t1, np.inf), axis=-1, initial=np.inf)
+
 @dataclasses.dataclass 
 class Wall: 
     endpoints: ndarray 
@@ -18,23 +57,12 @@ class Wall:
 
     def ray_intersection(self, ray_origin: ndarray, ray_direction: ndarray) -> list: 
         ray_direction = normalize(ray_direction)
-        
-        v1: ndarray = ray_origin - self.endpoints[0]
-        v2: ndarray = self.endpoints[1] - self.endpoints[0]
-        v3: ndarray = np.array([-ray_direction[1], ray_direction[0]])
-
-
-        if np.dot(v2, v3) != 0.: 
-            t1: ndarray = np.cross(v2, v1) / np.dot(v2, v3)
-            t2: ndarray = np.dot(v1, v3) / np.dot(v2, v3)
-        else: 
-            t1 = -np.inf
-            t2 = -np.inf
+        distance: float = ray_intersections(ray_origin, ray_direction[None, :], self.endpoints[None])[0]
 
         intersections: List[ndarray] = []
 
-        if t1 >= 0.0 and t2 >= 0.0 and t2 <= 1.0:
-            intersections.append(ray_origin + t1 * ray_direction)
+        if np.isfinite(distance): 
+            intersections.append(ray_origin + distance * ray_direction)
 
         return intersections
 
@@ -53,6 +81,14 @@ class Environment(ABC):
     def distance_to_boundary(self, point: ndarray, direction: ndarray) -> float: 
         raise NotImplementedError
 
+    def inside_points(self, points: ndarray) -> ndarray: 
+        """(N,) boolean array of whether each of the (N, 2) `points` is inside.""" 
+        return np.array([self.inside(point) for point in points], dtype=bool)
+
+    def distances_to_boundary(self, point: ndarray, directions: ndarray) -> ndarray: 
+        """(K,) array of distances from `point` to the boundary along each of the (K, 2) `directions`.""" 
+        return np.array([self.distance_to_boundary(point, direction) for direction in directions], dtype=float)
+
     @abstractmethod 
     def draw(self, ax) -> None: 
         raise NotImplementedError
@@ -72,18 +108,34 @@ class BoxEnvironment(Environment):
         right: ndarray = np.array([1., 0.])
         left: ndarray = np.array([-1., 0.])
 
+        # -- walls are views onto one packed array, so translating a wall updates it in place 
+        self._endpoints: ndarray = np.array([
+            [bottom_left, bottom_right], 
+            [bottom_right, top_right], 
+            [top_right, top_left], 
+            [top_left, bottom_left], 
+        ])
         self._walls: Sequence[Wall] = [
-            Wall(endpoints=np.array([bottom_left, bottom_right]), inside_normal=up), 
-            Wall(endpoints=np.array([bottom_right, top_right]), inside_normal=left), 
-            Wall(endpoints=np.array([top_right, top_left]), inside_normal=down), 
-            Wall(endpoints=np.array([top_left, bottom_left]), inside_normal=right), 
+            Wall(endpoints=self._endpoints[0], inside_normal=up), 
+            Wall(endpoints=self._endpoints[1], inside_normal=left), 
+            Wall(endpoints=self._endpoints[2], inside_normal=down), 
+            Wall(endpoints=self._endpoints[3], inside_normal=right), 
         ]
 
     def translate(self, translation: np.ndarray) -> None:
-        self.origin = translation
+        self.origin = self.origin + translation
         for wall in self._walls:
             wall.translate(translation)
 
+    def _adopt(self, endpoints: ndarray) -> None: 
+        """Moves the walls into `endpoints` (e.g., a slice of a composite's packed array), so 
+        that later translations update that array in place. 
+        """
+        endpoints[...] = self._endpoints
+        self._endpoints = endpoints
+        for wall, wall_endpoints in zip(self._walls, endpoints): 
+            wall.endpoints = wall_endpoints
+
     def __repr__(self) -> str: 
         return f"{self.__class__.__name__}(wall_length={self.wall_length})"
 
@@ -94,22 +146,22 @@ class BoxEnvironment(Environment):
         return (within_width and within_height)
 
     def distance_to_boundary(self, point: ndarray, direction: ndarray) -> float: 
-        distances: list = [] 
-        for wall in self._walls: 
-            intersection = wall.ray_intersection(point, direction)
-
-            if len(intersection) != 0: 
-                distances.append(np.linalg.norm(intersection[0] - point))
+        return self.distances_to_boundary(point, direction[None, :])[0]
 
-        if len(distances) > 0: 
-            return min(distances)
-        else: 
-            return [np.inf]
+    def distances_to_boundary(self, point: ndarray, directions: ndarray) -> ndarray: 
+        return ray_intersections(point, directions, self._endpoints)
 
     def draw(self, ax) -> None: 
         for wall in self._walls: 
             wall.draw(ax)
 
+    def pack(self) -> "PackedEnvironment": 
+        return PackedEnvironment(
+            endpoints=self._endpoints.copy(), 
+            box_origins=np.array([self.origin]), 
+            box_half_lengths=np.array([self.wall_length / 2.]), 
+        )
+
 
 class CompositeEnvironment(Environment): 
     def __init__(self, boxes: Sequence[BoxEnvironment], box_origins: Sequence[np.ndarray], exterior_wall_length: float) -> None: 
@@ -119,6 +171,17 @@ class CompositeEnvironment(Environment):
         for obstacle, translation in zip(self.obstacles, box_origins): 
             obstacle.translate(translation)
 
+        # -- the boxes' walls become views onto one packed array, so translating an obstacle 
+        # afterwards moves it here too (wall directions are unaffected by translation) 
+        boxes: Sequence[BoxEnvironment] = [self.exterior, *self.obstacles]
+        self._endpoints: ndarray = np.concatenate([box._endpoints for box in boxes])
+        offset: int = 0
+        for box in boxes: 
+            num_walls: int = box._endpoints.shape[0]
+            box._adopt(self._endpoints[offset:offset + num_walls])
+            offset += num_walls
+        self._wall_directions: ndarray = self._endpoints[:, 1] - self._endpoints[:, 0]
+
     def inside(self, point: np.ndarray) -> bool: 
         is_inside: bool = self.exterior.inside(point)
 
@@ -128,15 +191,247 @@ class CompositeEnvironment(Environment):
         return is_inside
 
     def distance_to_boundary(self, point: ndarray, direction: ndarray) -> float: 
-        distance: float = self.exterior.distance_to_boundary(point, direction) 
+        return self.distances_to_boundary(point, direction[None, :])[0]
 
-        for obstacle in self.obstacles: 
-            obstacle_distance: float = obstacle.distance_to_boundary(point, direction) 
-            if (obstacle_distance < distance): distance = obstacle_distance
-
-        return distance 
+    def distances_to_boundary(self, point: ndarray, directions: ndarray) -> ndarray: 
+        return ray_intersections(point, directions, self._endpoints, self._wall_directions)
 
     def draw(self, ax) -> None: 
         self.exterior.draw(ax)
         for obstacle in self.obstacles: 
             obstacle.draw(ax)
+
+    def pack(self) -> "PackedEnvironment": 
+        boxes: Sequence[BoxEnvironment] = [self.exterior, *self.obstacles]
+        return PackedEnvironment(
+            endpoints=self._endpoints.copy(), 
+            box_origins=np.array([box.origin for box in boxes]), 
+            box_half_lengths=np.array([box.wall_length / 2. for box in boxes]), 
+        )
+
+
+class PackedEnvironment(Environment): 
+    """A box environment (an exterior box, less any obstacle boxes) whose geometry is 
+    stored as flat arrays rather than as `BoxEnvironment` and `Wall` objects. 
+
+    Parameters 
+    ----------
+    endpoints: ndarray 
+        (num_walls, 2, 2) array of wall endpoints. 
+    box_origins: ndarray 
+        (num_boxes, 2) array of box centers; the first box is the exterior, the rest are obstacles. 
+    box_half_lengths: ndarray 
+        (num_boxes,) array of half the wall length of each box. 
+    wall_directions: ndarray 
+        optional precomputed (num_walls, 2) array of `endpoints[:, 1] - endpoints[:, 0]`. 
+    """
+    def __init__(self, endpoints: ndarray, box_origins: ndarray, box_half_lengths: ndarray, wall_directions: Optional[ndarray]=None) -> None: 
+        self.endpoints: ndarray = endpoints 
+        self.box_origins: ndarray = box_origins 
+        self.box_half_lengths: ndarray = box_half_lengths 
+        self.wall_directions: ndarray = endpoints[:, 1] - endpoints[:, 0] if wall_directions is None else wall_directions
+
+    def __repr__(self) -> str: 
+        return f"{self.__class__.__name__}(num_walls={self.endpoints.shape[0]}, num_boxes={self.box_origins.shape[0]})"
+
+    @property 
+    def arrays(self) -> dict: 
+        return dict(endpoints=self.endpoints, box_origins=self.box_origins, box_half_lengths=self.box_half_lengths, wall_directions=self.wall_directions)
+
+    def inside(self, point: ndarray) -> bool: 
+        within: ndarray = np.all(np.abs(point - self.box_origins) < self.box_half_lengths[:, None], axis=1)
+        return bool(within[0] and not np.any(within[1:]))
+
+    def inside_points(self, points: ndarray) -> ndarray: 
+        within: ndarray = np.all(np.abs(points[:, None, :] - self.box_origins) < self.box_half_lengths[:, None], axis=-1)
+        return within[:, 0] & ~np.any(within[:, 1:], axis=1)
+
+    def distance_to_boundary(self, point: ndarray, direction: ndarray) -> float: 
+        return self.distances_to_boundary(point, direction[None, :])[0]
+
+    def distances_to_boundary(self, point: ndarray, directions: ndarray) -> ndarray: 
+        return ray_intersections(point, directions, self.endpoints, self.wall_directions)
+
+    def draw(self, ax) -> None: 
+        for endpoints in self.endpoints: 
+            ax.plot(endpoints[:, 0], endpoints[:, 1], c="k")
+
+
+def _lower_envelope(f: ndarray) -> ndarray: 
+    """Squared Euclidean distance transform of the sampled function `f` along the last axis, 
+    `min_j f[..., j] + (i - j)^2`, by the linear-time lower envelope of parabolas of 
+    Felzenszwalb & Huttenlocher (2012), stepped along the axis and vectorized over the rows. 
+    """
+    height, width = f.shape
+    rows: ndarray = np.arange(height)
+    squares: ndarray = np.arange(width, dtype=float) ** 2
+
+    # -- vertices (v) of the parabolas in the envelope and the boundaries (z) between them 
+    k: ndarray = np.zeros(height, dtype=int)
+    v: ndarray = np.zeros((height, width), dtype=int)
+    z: ndarray = np.empty((height, width + 1))
+    z[:, 0], z[:, 1] = -np.inf, np.inf
+
+    def intersection(q: int, rows: ndarray, vertices: ndarray) -> ndarray: 
+        return ((f[rows, q] + squares[q]) - (f[rows, vertices] + squares[vertices])) / (2. * (q - vertices))
+
+    for q in range(1, width): 
+        s: ndarray = intersection(q, rows, v[rows, k])
+        hidden: ndarray = s <= z[rows, k]
+        while np.any(hidden): 
+            k[hidden] -= 1
+            s[hidden] = intersection(q, rows[hidden], v[rows[hidden], k[hidden]])
+            hidden[hidden] = s[hidden] <= z[rows[hidden], k[hidden]]
+        k += 1
+        v[rows, k] = q
+        z[rows, k] = s
+        z[rows, k + 1] = np.inf
+
+    squared_distance: ndarray = np.empty((height, width))
+    k[:] = 0
+    for q in range(width): 
+        beyond: ndarray = z[rows, k + 1] < q
+        while np.any(beyond): 
+            k[beyond] += 1
+            beyond[beyond] = z[rows[beyond], k[beyond] + 1] < q
+        vertices: ndarray = v[rows, k]
+        squared_distance[:, q] = (q - vertices) ** 2 + f[rows, vertices]
+
+    return squared_distance
+
+def _distance_transform(mask: ndarray) -> ndarray: 
+    """Exact Euclidean distance (in cells) from every True cell of `mask` to the nearest 
+    False cell, computed separably: nearest False cell along each column, then a linear-time 
+    lower envelope pass over the squared column distances along each row. 
+    """
+    height, width = mask.shape
+    big: float = float(height + width)
+    rows: ndarray = np.arange(height)[:, None] * np.ones(width, dtype=int)
+
+    # -- column pass: distance to the nearest False cell above and below 
+    last_above: ndarray = np.maximum.accumulate(np.where(~mask, rows, -1), axis=0)
+    next_below: ndarray = np.flip(np.minimum.accumulate(np.flip(np.where(~mask, rows, height + width), axis=0), axis=0), axis=0)
+    column_distance: ndarray = np.minimum(np.where(last_above >= 0, rows - last_above, big), np.where(next_below < height + width, next_below - rows, big))
+
+    # -- row pass 
+    return np.sqrt(_lower_envelope(column_distance ** 2))
+
+
+class GridEnvironment(Environment): 
+    """An environment represented as a rasterized occupancy grid together with a precomputed 
+    signed distance field (positive in free space, negative inside obstacles). Everything 
+    outside the grid is treated as occupied. 
+
+    Parameters 
+    ----------
+    occupancy: ndarray 
+        (height, width) boolean array; row `i`, column `j` covers the square whose lower-left 
+        corner is `origin + cell_size * (j, i)`, and is True if that cell is occupied. 
+    cell_size: float 
+        side length of a cell [m]. 
+    origin: ndarray 
+        world coordinates of the lower-left corner of the grid. 
+    sdf: ndarray 
+        optional precomputed signed distance field (e.g., loaded from a cache). 
+    """
+    max_distance: float = np.inf # [m] rays travelling further than this report no intersection
+
+    def __init__(self, occupancy: ndarray, cell_size: float, origin: Optional[ndarray]=None, sdf: Optional[ndarray]=None) -> None: 
+        self.occupancy: ndarray = np.asarray(occupancy, dtype=bool)
+        self.cell_size: float = cell_size 
+        self.origin: ndarray = np.zeros(2) if origin is None else np.asarray(origin, dtype=float)
+        self.shape: Tuple[int, int] = self.occupancy.shape
+
+        if sdf is None: 
+            # -- pad with an occupied border so the field accounts for the (occupied) region outside the grid
+            padded: ndarray = np.pad(self.occupancy, 1, constant_values=True)
+            sdf = cell_size * (_distance_transform(~padded) - _distance_transform(padded))[1:-1, 1:-1]
+        self.sdf: ndarray = sdf
+
+    def __repr__(self) -> str: 
+        return f"{self.__class__.__name__}(shape={self.shape}, cell_size={self.cell_size}, origin={self.origin})"
+
+    @classmethod 
+    def from_environment(cls, environment: Environment, cell_size: float) -> "GridEnvironment": 
+        """Rasterizes a `BoxEnvironment`, `CompositeEnvironment` or `PackedEnvironment`, 
+        sampling occupancy at cell centers. 
+        """
+        packed: PackedEnvironment = environment if isinstance(environment, PackedEnvironment) else environment.pack()
+        lower: ndarray = packed.box_origins[0] - packed.box_half_lengths[0]
+        num_cells: int = int(np.ceil(2. * packed.box_half_lengths[0] / cell_size))
+
+        centers: ndarray = cell_size * (np.arange(num_cells) + 0.5)
+        points: ndarray = (lower + np.stack(np.meshgrid(centers, centers), axis=-1))[..., None, :]
+        within: ndarray = np.all(np.abs(points - packed.box_origins) < packed.box_half_lengths[:, None], axis=-1)
+        free: ndarray = within[..., 0] & ~np.any(within[..., 1:], axis=-1)
+        return cls(~free, cell_size, lower)
+
+    @classmethod 
+    def from_file(cls, path: os.PathLike, cell_size: float, origin: Optional[ndarray]=None, threshold: Optional[float]=0.5) -> "GridEnvironment": 
+        """Loads a grid from a `.npy` array (nonzero cells are occupied) or from an image 
+        (cells darker than `threshold` are occupied; the top row of the image is the top of the map). 
+        """
+        if os.path.splitext(path)[1] == ".npy": 
+            occupancy: ndarray = np.load(path) != 0
+        else: 
+            image: ndarray = plt.imread(path)
+            if image.dtype == np.uint8: 
+                image = image / 255.
+            intensity: ndarray = image[..., :3].mean(axis=-1) if image.ndim == 3 else image
+            occupancy = np.flipud(intensity < threshold)
+        return cls(occupancy, cell_size, origin)
+
+    def _cell(self, point: ndarray) -> Tuple[int, int]: 
+        column, row = np.floor((point - self.origin) / self.cell_size).astype(int)
+        return row, column
+
+    def _in_grid(self, row: int, column: int) -> bool: 
+        return (0 <= row < self.shape[0]) and (0 <= column < self.shape[1])
+
+    def inside(self, point: ndarray) -> bool: 
+        row, column = self._cell(point)
+        return self._in_grid(row, column) and not self.occupancy[row, column]
+
+    def inside_points(self, points: ndarray) -> ndarray: 
+        cells: ndarray = np.floor((points - self.origin) / self.cell_size).astype(int)
+        in_grid: ndarray = np.all((cells >= 0) & (cells < (self.shape[1], self.shape[0])), axis=1)
+        inside: ndarray = np.zeros(points.shape[0], dtype=bool)
+        inside[in_grid] = ~self.occupancy[cells[in_grid, 1], cells[in_grid, 0]]
+        return inside
+
+    def signed_distance(self, point: ndarray) -> float: 
+        row, column = self._cell(point)
+        return self.sdf[row, column] if self._in_grid(row, column) else -self.cell_size
+
+    def _cell_exit(self, point: ndarray, direction: ndarray) -> float: 
+        """Distance along `direction` from `point` to the boundary of the cell containing it."""
+        lower: ndarray = self.origin + self.cell_size * np.floor((point - self.origin) / self.cell_size)
+        boundary: ndarray = np.where(direction > 0., lower + self.cell_size, lower)
+        return np.min(np.divide(boundary - point, direction, out=np.full(2, np.inf), where=(direction != 0.)))
+
+    def distance_to_boundary(self, point: ndarray, direction: ndarray) -> float: 
+        """Sphere traces the SDF from `point` along `direction` while it is far from any 
+        obstacle, then walks the ray cell by cell, returning where it enters the first 
+        occupied cell. 
+        """
+        direction = normalize(direction)
+        # the SDF is measured between cell centers: both the query point and the nearest 
+        # occupied boundary may be half a diagonal closer than the centers of their cells 
+        slack: float = self.cell_size * np.sqrt(2.)
+        nudge: float = self.cell_size * 1e-6
+
+        distance: float = 0. 
+        while distance <= self.max_distance: 
+            position: ndarray = point + distance * direction
+            if not self.inside(position): 
+                return distance 
+            step: float = self.signed_distance(position) - slack
+            if step < self.cell_size: 
+                step = self._cell_exit(position, direction) + nudge
+            distance += step
+
+        return np.inf
+
+    def draw(self, ax) -> None: 
+        extent: ndarray = [self.origin[0], self.origin[0] + self.cell_size * self.shape[1], self.origin[1], self.origin[1] + self.cell_size * self.shape[0]]
+        ax.imshow(self.occupancy, origin="lower", extent=extent, cmap="Greys")
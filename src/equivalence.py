@@ -0,0 +1,190 @@
+"""Equivalence and throughput checks for the Python (`Creature`) and C (`CreatureCInterface`)
+controllers.
+
+Both controllers are driven over the same seeded distance sequences, including the edge
+cases the port has historically gotten wrong (e.g., asymmetric left/right readings, which
+exposed the duplicated `sonar_basis_vectors[2]` assignment in `initialize_controller_default`).
+Wander is disabled for these, since the two draw from different random generators. Both the
+heading before discretization and the returned control signal are compared; the C controller
+discretizes its output, so the Python output is passed through `control.discretize` (the
+Python reference of the C function) first. A separate check with wander enabled covers the
+wander path independently of the generators: both controllers must fire on the same calls,
+every fired wander force must have unit norm, and each C output must follow from its own
+avoid and wander forces.
+
+Throughput of both paths is then measured with `replay.replay` (with debug output off, so
+that the controllers rather than string formatting are timed). The primary check is relative:
+the C path must sustain at least `c_over_python` times the calls per second of the Python path
+on the same machine. The absolute floors recorded in `THRESHOLDS_PATH` are a secondary
+regression guard only; they are specific to the machine they were recorded on, so rerecord
+them (`--record`) when moving the gate to other hardware. Run as a script; the exit status
+is nonzero if any check fails.
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from control import HCS04Controller, Creature, CreatureCInterface, discretize
+from replay import ControllerTrace, disable_wander, replay
+from simulation import Simulator
+from typedefs import namespace, ndarray
+from utils import PROJECT_DIRECTORY
+
+THRESHOLDS_PATH: os.PathLike = os.path.join(PROJECT_DIRECTORY, "benchmarks", "controller_thresholds.json")
+
+def edge_case_traces(num_calls: int, seed: Optional[int]=0) -> Dict[str, ControllerTrace]:
+    rng: np.random.Generator = np.random.default_rng(seed)
+    times: ndarray = np.arange(num_calls) * Simulator.step_duration
+    num_sensors: int = 4
+
+    # -- the front sensor reading at which its repulsive force alone has unit magnitude (cancelling the default wander)
+    cancelling_distance: float = 0.001 ** (1. / 5.) - 0.001
+
+    distances: Dict[str, ndarray] = dict(
+        uniform=rng.uniform(0.02, 4., (num_calls, num_sensors)),
+        near_contact=rng.uniform(0., 0.05, (num_calls, num_sensors)),
+        zeros=np.zeros((num_calls, num_sensors)),
+        out_of_range=np.full((num_calls, num_sensors), 100.),
+        asymmetric_sides=np.column_stack((
+            rng.uniform(1., 4., num_calls),
+            rng.uniform(0.05, 0.2, num_calls),
+            rng.uniform(1., 4., num_calls),
+            rng.uniform(1., 4., num_calls),
+        )),
+        cancelling=np.column_stack((
+            cancelling_distance + rng.normal(scale=1e-6, size=num_calls),
+            np.full((num_calls, num_sensors - 1), 100.),
+        )),
+    )
+    return {name: ControllerTrace(distances=sequence, times=times) for name, sequence in distances.items()}
+
+def quiet(controller: HCS04Controller) -> HCS04Controller:
+    controller.verbose = False
+    controller.record_history = False
+    return controller
+
+def check_equivalence(trace: ControllerTrace, rtol: Optional[float]=1e-9, atol: Optional[float]=1e-12) -> dict:
+    """Drives fresh Python and C controllers (wander disabled) over `trace`, comparing the
+    avoid force, the undiscretized heading and the returned (discretized) control signal on
+    every call.
+    """
+    python_controller: Creature = quiet(disable_wander(Creature()))
+    c_controller: CreatureCInterface = quiet(disable_wander(CreatureCInterface()))
+
+    force_error: float = 0.
+    heading_error: float = 0.
+    output_error: float = 0.
+    num_mismatched: int = 0
+
+    for distances, time in zip(trace.distances, trace.times):
+        python_heading: ndarray = python_controller(distances, time)
+        c_output: ndarray = c_controller(distances, time)
+        python_output: ndarray = discretize(python_heading)
+
+        force_scale: float = max(np.max(np.abs(python_controller.prev_force)), 1.)
+        force_error = max(force_error, np.max(np.abs(python_controller.prev_force - c_controller.prev_force)) / force_scale)
+        heading_error = max(heading_error, np.max(np.abs(python_heading - c_controller.prev_heading)))
+        output_error = max(output_error, np.max(np.abs(python_output - c_output)))
+
+        matches: bool = (
+            np.allclose(python_controller.prev_force, c_controller.prev_force, rtol=rtol, atol=atol)
+            and np.allclose(python_heading, c_controller.prev_heading, rtol=rtol, atol=atol)
+            and np.allclose(python_output, c_output, rtol=rtol, atol=atol)
+        )
+        num_mismatched += int(not matches)
+
+    return dict(ok=(num_mismatched == 0), num_mismatched=num_mismatched, relative_force_error=float(force_error), heading_error=float(heading_error), output_error=float(output_error))
+
+def check_wander(trace: ControllerTrace, atol: Optional[float]=1e-12) -> dict:
+    """Drives fresh Python and C controllers with wander enabled over `trace`. The wander
+    draws differ, so rather than comparing outputs this checks that both fire on the same
+    calls, that every fired wander force has unit norm, and that each C output is the
+    discretized, normalized sum of its own avoid and wander forces.
+    """
+    python_controller: Creature = quiet(Creature())
+    c_controller: CreatureCInterface = quiet(CreatureCInterface())
+    default_wander: ndarray = np.array([0., 1.])
+
+    num_mismatched: int = 0
+    num_fired: int = 0
+    for distances, time in zip(trace.distances, trace.times):
+        python_controller(distances, time)
+        c_output: ndarray = c_controller(distances, time)
+
+        python_fired: bool = not np.array_equal(python_controller.prev_wander_force, default_wander)
+        c_wander: ndarray = c_controller.prev_wander_force
+        c_fired: bool = not np.array_equal(c_wander, default_wander)
+        num_fired += int(c_fired)
+
+        combined: ndarray = c_controller.prev_force + c_wander
+        expected_output: ndarray = discretize(combined) if np.linalg.norm(combined) > c_controller.c_controller.significant_force_threshold else np.zeros(2)
+
+        ok: bool = (
+            (python_fired == c_fired)
+            and (not c_fired or abs(np.linalg.norm(c_wander) - 1.) <= atol)
+            and (not python_fired or abs(np.linalg.norm(python_controller.prev_wander_force) - 1.) <= atol)
+            and np.allclose(c_output, expected_output, rtol=0., atol=atol)
+        )
+        num_mismatched += int(not ok)
+
+    return dict(ok=(num_mismatched == 0 and num_fired > 0), num_mismatched=num_mismatched, num_fired=num_fired)
+
+def benchmark(trace: ControllerTrace, controllers: Dict[str, Callable[[], HCS04Controller]], repeats: Optional[int]=3) -> Dict[str, float]:
+    """Best-of-`repeats` calls per second of each controller over `trace`, with debug output off."""
+    return {name: max(replay(trace, quiet(factory())).calls_per_second for _ in range(repeats)) for name, factory in controllers.items()}
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--num_calls", type=int, default=1000)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--thresholds", type=str, default=THRESHOLDS_PATH)
+parser.add_argument("--record", action="store_true")
+parser.add_argument("--margin", type=float, default=0.5, help="fraction of the measured throughput recorded as the (machine-specific) absolute floor")
+parser.add_argument("--min_speedup", type=float, default=1., help="minimum C/Python throughput ratio recorded with --record")
+
+def main(args: namespace) -> int:
+    traces: Dict[str, ControllerTrace] = edge_case_traces(args.num_calls, args.seed)
+    failed: bool = False
+
+    for name, trace in traces.items():
+        result: dict = check_equivalence(trace)
+        failed |= not result["ok"]
+        print(f"[{'ok' if result['ok'] else 'FAIL'}] equivalence/{name}: mismatched calls: {result['num_mismatched']}/{len(trace)}\trelative force error: {result['relative_force_error']:0.3e}\theading error: {result['heading_error']:0.3e}\toutput error: {result['output_error']:0.3e}")
+
+    wander: dict = check_wander(traces["uniform"])
+    failed |= not wander["ok"]
+    print(f"[{'ok' if wander['ok'] else 'FAIL'}] wander/uniform: mismatched calls: {wander['num_mismatched']}/{len(traces['uniform'])}\twander firings: {wander['num_fired']}")
+
+    throughput: Dict[str, float] = benchmark(traces["uniform"], dict(python=Creature, c=CreatureCInterface))
+
+    if args.record:
+        os.makedirs(os.path.dirname(args.thresholds), exist_ok=True)
+        with open(args.thresholds, "w") as thresholds_file:
+            recorded: Dict[str, float] = dict(c_over_python=args.min_speedup)
+            recorded.update({name: args.margin * calls_per_second for name, calls_per_second in throughput.items()})
+            json.dump(recorded, thresholds_file, indent=4)
+        print(f"recorded throughput thresholds to {args.thresholds}")
+
+    with open(args.thresholds, "r") as thresholds_file:
+        thresholds: Dict[str, float] = json.load(thresholds_file)
+
+    # -- primary: the C path must outpace the Python path on this machine
+    speedup: float = throughput["c"] / throughput["python"]
+    ok: bool = speedup >= thresholds.get("c_over_python", 1.)
+    failed |= not ok
+    print(f"[{'ok' if ok else 'FAIL'}] throughput/c_over_python: {speedup:0.2f}x (threshold {thresholds.get('c_over_python', 1.):0.2f}x)")
+
+    # -- secondary: machine-specific absolute floors
+    for name, calls_per_second in throughput.items():
+        ok = calls_per_second >= thresholds.get(name, 0.)
+        failed |= not ok
+        print(f"[{'ok' if ok else 'FAIL'}] throughput/{name}: {calls_per_second:0.1f} calls/s (floor {thresholds.get(name, 0.):0.1f})")
+
+    return int(failed)
+
+if __name__=="__main__":
+    args = parser.parse_args()
+    sys.exit(main(args))
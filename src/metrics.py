@@ -0,0 +1,144 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+import numpy as np
+
+from typedefs import ndarray
+from vehicle import Vehicle
+
+class Metric(ABC):
+    """A streaming aggregate over a simulation run, updated once per vehicle per step
+    and using memory independent of the run length.
+    """
+    name: str = "metric"
+
+    @abstractmethod
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, vehicle_index: int, vehicle: Vehicle, distances: ndarray) -> None:
+        """Incorporates one vehicle's state after one simulator step.
+
+        Parameters
+        ----------
+        vehicle_index: int
+            index of the vehicle in `Simulator.vehicles`.
+        vehicle: Vehicle
+            the vehicle, after its velocity has been updated for this step.
+        distances: ndarray
+            the distance measurements passed to the vehicle's controller this step.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def summary(self) -> dict:
+        raise NotImplementedError
+
+class RunningMoments:
+    """Welford's online mean and variance of a scalar stream."""
+    def __init__(self) -> None:
+        self.reset()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(count={self.count}, mean={self.mean}, variance={self.variance})"
+
+    def reset(self) -> None:
+        self.count: int = 0
+        self.mean: float = 0.
+        self._sum_squared_deviations: float = 0.
+
+    def push(self, value: float) -> None:
+        self.count += 1
+        delta: float = value - self.mean
+        self.mean += delta / self.count
+        self._sum_squared_deviations += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self._sum_squared_deviations / (self.count - 1) if self.count > 1 else 0.
+
+class ForceMagnitudeMoments(Metric):
+    name: str = "force_magnitude"
+
+    def __init__(self) -> None:
+        self.moments: RunningMoments = RunningMoments()
+
+    def reset(self) -> None:
+        self.moments.reset()
+
+    def update(self, vehicle_index: int, vehicle: Vehicle, distances: ndarray) -> None:
+        self.moments.push(float(np.linalg.norm(vehicle.controller.prev_force)))
+
+    def summary(self) -> dict:
+        return dict(count=self.moments.count, mean=self.moments.mean, variance=self.moments.variance)
+
+class MinimumDistanceHistogram(Metric):
+    name: str = "minimum_distance"
+
+    def __init__(self, bin_edges: Optional[ndarray]=None) -> None:
+        self.bin_edges: ndarray = np.linspace(0., 4., 41) if bin_edges is None else bin_edges
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts: ndarray = np.zeros(self.bin_edges.size - 1, dtype=int)
+        self.moments: RunningMoments = RunningMoments()
+
+    def update(self, vehicle_index: int, vehicle: Vehicle, distances: ndarray) -> None:
+        minimum_distance: float = float(np.min(distances))
+        self.moments.push(minimum_distance)
+
+        # -- out of range readings are clipped into the outermost bins
+        index: int = np.searchsorted(self.bin_edges, minimum_distance, side="right") - 1
+        self.counts[np.clip(index, 0, self.counts.size - 1)] += 1
+
+    def summary(self) -> dict:
+        return dict(bin_edges=self.bin_edges, counts=self.counts, mean=self.moments.mean, variance=self.moments.variance)
+
+class CoverageBitmap(Metric):
+    """Marks the cells of a regular grid over `bounds` visited by any vehicle."""
+    name: str = "coverage"
+
+    def __init__(self, bounds: Tuple[ndarray, ndarray], cell_size: Optional[float]=0.05) -> None:
+        self.lower: ndarray = np.asarray(bounds[0], dtype=float)
+        self.upper: ndarray = np.asarray(bounds[1], dtype=float)
+        self.cell_size: float = cell_size
+        self.shape: Tuple[int, int] = tuple(np.ceil((self.upper - self.lower) / cell_size).astype(int))
+        self.reset()
+
+    def reset(self) -> None:
+        self.visited: ndarray = np.zeros(self.shape, dtype=bool)
+
+    def update(self, vehicle_index: int, vehicle: Vehicle, distances: ndarray) -> None:
+        cell: ndarray = np.floor((vehicle.position - self.lower) / self.cell_size).astype(int)
+        if np.all(cell >= 0) and np.all(cell < self.shape):
+            self.visited[tuple(cell)] = True
+
+    def summary(self) -> dict:
+        return dict(visited=self.visited, fraction_visited=float(self.visited.mean()))
+
+class WallContactCounter(Metric):
+    """Counts steps on which a vehicle's closest reading falls below `contact_threshold`,
+    and separately the number of distinct contacts (consecutive contact steps count once).
+    """
+    name: str = "wall_contacts"
+
+    def __init__(self, contact_threshold: Optional[float]=0.05) -> None:
+        self.contact_threshold: float = contact_threshold
+        self.reset()
+
+    def reset(self) -> None:
+        self.contact_steps: int = 0
+        self.contacts: int = 0
+        self._in_contact: dict = {}
+
+    def update(self, vehicle_index: int, vehicle: Vehicle, distances: ndarray) -> None:
+        in_contact: bool = bool(np.min(distances) < self.contact_threshold)
+        if in_contact:
+            self.contact_steps += 1
+            if not self._in_contact.get(vehicle_index, False):
+                self.contacts += 1
+        self._in_contact[vehicle_index] = in_contact
+
+    def summary(self) -> dict:
+        return dict(contact_steps=self.contact_steps, contacts=self.contacts)
@@ -0,0 +1,210 @@
+import argparse
+import contextlib
+import dataclasses
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from control import HCS04Controller, Creature, CreatureCInterface
+from typedefs import namespace, ndarray
+
+@dataclasses.dataclass
+class ControllerTrace:
+    """The (distances, time) stream fed to a controller's `__call__`, stored
+    as a (num_calls, num_sensors) array of distances and a (num_calls,) array of times.
+    """
+    distances: ndarray
+    times: ndarray
+
+    def __len__(self) -> int:
+        return self.times.size
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(num_calls={len(self)}, num_sensors={self.distances.shape[1]})"
+
+    def save(self, path: os.PathLike) -> None:
+        with open(path, "wb") as trace_file:
+            np.savez_compressed(trace_file, distances=self.distances, times=self.times)
+
+    @classmethod
+    def load(cls, path: os.PathLike) -> "ControllerTrace":
+        with np.load(path) as archive:
+            return cls(distances=archive["distances"], times=archive["times"])
+
+class RecordingController(HCS04Controller):
+    """Wraps a controller, recording every (distances, time) pair it is called with
+    and otherwise behaving exactly as the wrapped controller.
+    """
+    def __init__(self, controller: HCS04Controller) -> None:
+        self.controller: HCS04Controller = controller
+        self.recorded_distances: List[ndarray] = []
+        self.recorded_times: List[float] = []
+
+    def __getattr__(self, name: str):
+        if name == "controller":
+            raise AttributeError(name)
+        return getattr(self.controller, name)
+
+    def register_headings(self, headings: ndarray) -> None:
+        self.controller.register_headings(headings)
+
+    def reset(self) -> None:
+        self.controller.reset()
+
+    def __call__(self, distances: ndarray, time: float) -> ndarray:
+        self.recorded_distances.append(np.array(distances, dtype=float))
+        self.recorded_times.append(time)
+        return self.controller(distances, time)
+
+    @property
+    def trace(self) -> ControllerTrace:
+        return ControllerTrace(distances=np.array(self.recorded_distances), times=np.array(self.recorded_times))
+
+@dataclasses.dataclass
+class ReplayResult:
+    outputs: ndarray
+    elapsed: float # [s]
+    headings: Optional[ndarray] = None
+
+    @property
+    def calls_per_second(self) -> float:
+        return self.outputs.shape[0] / self.elapsed if self.elapsed > 0. else np.inf
+
+def record(simulator, num_steps: int, **kwargs) -> List[ControllerTrace]:
+    """Runs `simulator` for `num_steps` steps and returns one trace per vehicle.
+    """
+    recorders: List[RecordingController] = []
+    for vehicle in simulator.vehicles:
+        recorders.append(RecordingController(vehicle.controller))
+        vehicle.controller = recorders[-1]
+
+    try:
+        simulator.simulate(num_steps, **kwargs)
+    finally:
+        for vehicle, recorder in zip(simulator.vehicles, recorders):
+            vehicle.controller = recorder.controller
+
+    return [recorder.trace for recorder in recorders]
+
+def disable_wander(controller: HCS04Controller) -> HCS04Controller:
+    """Turns off the (stochastic) wander behavior of a `Creature` or `CreatureCInterface`, so
+    that the two can be compared call for call: they draw from different random generators, and
+    the C controller's `rand()` is not reachable from numpy's seed.
+    """
+    if isinstance(controller, CreatureCInterface):
+        controller.c_controller.previous_wander_time = 0.
+        controller.c_controller.wander_period = np.iinfo(np.int32).max
+    else:
+        controller.prev_wander_time = 0.
+        controller.wander_period = np.inf
+    controller.record_history = False
+    return controller
+
+def replay(trace: ControllerTrace, controller: HCS04Controller, seed: Optional[int]=0, quiet: Optional[bool]=True, record_headings: Optional[bool]=False, batched: Optional[bool]=False) -> ReplayResult:
+    """Feeds `trace` through `controller` as fast as possible, with no environment or
+    simulator involved.
+
+    Parameters
+    ----------
+    trace: ControllerTrace
+        the recorded controller inputs.
+    controller: HCS04Controller
+        the controller to drive; any object accepting `(distances, time)` works.
+    seed: int
+        seed for numpy's global generator, so that stochastic (wander) behavior
+        is reproducible across replays.
+    quiet: bool
+        turn off the controller's debug output (`verbose`) for the duration of the replay,
+        so that the controller rather than string formatting is timed, and discard anything
+        else it prints.
+    record_headings: bool
+        also record `controller.prev_heading` after every call; unlike the output, this is
+        undiscretized for both `Creature` and `CreatureCInterface`.
+    batched: bool
+        feed the whole trace to `controller.batch(distances, times)` in a single call (e.g.,
+        `Creature.batch`, whose outputs are also its headings).
+
+    Returns
+    -------
+    result: ReplayResult
+        the (num_calls, 2) controller outputs (and headings, if recorded) and the wall-clock
+        time spent in the controller.
+    """
+    if seed is not None:
+        np.random.seed(seed)
+
+    outputs: ndarray = np.zeros((len(trace), 2))
+    headings: Optional[ndarray] = np.zeros((len(trace), 2)) if record_headings else None
+
+    verbose: Optional[bool] = getattr(controller, "verbose", None)
+    if quiet and verbose is not None:
+        controller.verbose = False
+
+    try:
+        with open(os.devnull, "w") as devnull, (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+            start: float = time.perf_counter()
+            if batched:
+                outputs[:] = controller.batch(trace.distances, trace.times)
+                if record_headings:
+                    headings[:] = outputs
+            else:
+                for i in range(len(trace)):
+                    outputs[i] = controller(trace.distances[i], trace.times[i])
+                    if record_headings:
+                        headings[i] = controller.prev_heading
+            elapsed: float = time.perf_counter() - start
+    finally:
+        if quiet and verbose is not None:
+            controller.verbose = verbose
+
+    return ReplayResult(outputs=outputs, elapsed=elapsed, headings=headings)
+
+def compare(trace: ControllerTrace, controllers: Dict[str, HCS04Controller], tolerance: Optional[float]=0., batched: Optional[Sequence[str]]=(), **kwargs) -> Dict[str, dict]:
+    """Replays `trace` through each of `controllers` (those named in `batched` through their
+    batched path), reporting calls per second and the divergence of each controller's
+    (undiscretized) headings from the first (reference) controller's. Disable wander
+    (`disable_wander`) on controllers that should agree exactly.
+    """
+    results: Dict[str, ReplayResult] = {name: replay(trace, controller, record_headings=True, batched=(name in batched), **kwargs) for name, controller in controllers.items()}
+    reference: ndarray = next(iter(results.values())).headings
+
+    report: Dict[str, dict] = {}
+    for name, result in results.items():
+        divergence: ndarray = np.linalg.norm(result.headings - reference, axis=1)
+        report[name] = dict(
+            calls_per_second=result.calls_per_second,
+            max_divergence=float(np.max(divergence, initial=0.)),
+            mean_divergence=float(np.mean(divergence)) if divergence.size else 0.,
+            num_divergent=int(np.sum(divergence > tolerance)),
+        )
+
+    return report
+
+parser = argparse.ArgumentParser()
+parser.add_argument("trace_path", type=str)
+parser.add_argument("--use_c", action="store_true")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--wander", action="store_true", help="keep wander enabled (the Python and C controllers then diverge)")
+parser.add_argument("--tolerance", type=float, default=1e-9)
+parser.add_argument("--batched", action="store_true", help="also replay the trace through `Creature.batch`")
+
+def main(args: namespace):
+    trace: ControllerTrace = ControllerTrace.load(args.trace_path)
+    controllers: Dict[str, HCS04Controller] = dict(python=Creature())
+    if args.use_c:
+        controllers["c"] = CreatureCInterface()
+    if args.batched:
+        controllers["python_batched"] = Creature()
+    if not args.wander:
+        for controller in controllers.values():
+            disable_wander(controller)
+
+    print(trace)
+    for name, statistics in compare(trace, controllers, tolerance=args.tolerance, batched=("python_batched",), seed=args.seed).items():
+        print(f"{name}: {statistics['calls_per_second']:0.1f} calls/s\tmax divergence: {statistics['max_divergence']:0.4e}\tdivergent calls: {statistics['num_divergent']}/{len(trace)}")
+
+if __name__=="__main__":
+    args = parser.parse_args()
+    main(args)
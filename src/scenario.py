@@ -0,0 +1,197 @@
+"""Declarative scenario files.
+
+A scenario is a JSON (or, when the corresponding parser is importable, TOML or YAML)
+document such as
+
+    {
+        "environment": {
+            "type": "composite",
+            "wall_length": 2.0,
+            "obstacles": [{"wall_length": 0.5, "origin": [0.5, 0.0]}]
+        },
+        "vehicles": [{"position": [0.0, 0.0], "use_c_controller": false, "controller": {"wander_period": 6.0}}],
+        "num_steps": 500,
+        "seed": 0
+    }
+
+Environments are of type "box" (`wall_length`), "composite" (`wall_length`, `obstacles`)
+or "grid" (`cell_size` and either `path` to an array/image file or a nested "composite"
+`environment` to rasterize). Compiled geometry is cached on disk keyed by a hash of the
+environment description and of `CACHE_FORMAT_VERSION`, so that repeated runs skip rebuilding
+it; bump the version whenever the layout of the cached arrays changes.
+"""
+import dataclasses
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from control import MAX_SENSORS, CreatureC
+from environment import Environment, BoxEnvironment, CompositeEnvironment, GridEnvironment, PackedEnvironment
+from simulation import Simulator
+from typedefs import ndarray
+from utils import get_project_subdirectory
+from vehicle import SimpleCar
+
+CACHE_FORMAT_VERSION: int = 1
+
+def get_scenario_cache_directory() -> os.PathLike:
+    return get_project_subdirectory("scenario_cache")
+
+def read_scenario_file(path: os.PathLike) -> dict:
+    extension: str = os.path.splitext(path)[1].lower()
+
+    if extension == ".json":
+        with open(path, "r") as scenario_file:
+            return json.load(scenario_file)
+    elif extension == ".toml":
+        import tomllib
+        with open(path, "rb") as scenario_file:
+            return tomllib.load(scenario_file)
+    elif extension in (".yaml", ".yml"):
+        import yaml
+        with open(path, "r") as scenario_file:
+            return yaml.safe_load(scenario_file)
+    else:
+        raise ValueError(f"unrecognized scenario file extension: {extension}")
+
+def build_environment(specification: dict, relative_to: Optional[os.PathLike]=None) -> Environment:
+    """Builds the environment described by `specification` directly, without caching."""
+    kind: str = specification.get("type", "composite")
+
+    if kind == "box":
+        return BoxEnvironment(specification["wall_length"])
+    elif kind == "composite":
+        obstacles: Sequence[dict] = specification.get("obstacles", [])
+        boxes: List[BoxEnvironment] = [BoxEnvironment(obstacle["wall_length"]) for obstacle in obstacles]
+        origins: ndarray = np.array([obstacle["origin"] for obstacle in obstacles], dtype=float).reshape(-1, 2)
+        return CompositeEnvironment(boxes, origins, specification["wall_length"])
+    elif kind == "grid":
+        if "path" in specification:
+            origin: Optional[ndarray] = np.array(specification["origin"], dtype=float) if "origin" in specification else None
+            return GridEnvironment.from_file(_resolve(specification["path"], relative_to), specification["cell_size"], origin, specification.get("threshold", 0.5))
+        return GridEnvironment.from_environment(build_environment(specification["environment"], relative_to), specification["cell_size"])
+    else:
+        raise ValueError(f"unrecognized environment type: {kind}")
+
+def _resolve(path: os.PathLike, relative_to: Optional[os.PathLike]) -> os.PathLike:
+    return path if (relative_to is None or os.path.isabs(path)) else os.path.join(relative_to, path)
+
+def environment_key(specification: dict, relative_to: Optional[os.PathLike]=None) -> str:
+    """Content hash of an environment description (and the cache format version), including
+    the contents of any map file it references.
+    """
+    digest = hashlib.sha256(json.dumps(dict(format=CACHE_FORMAT_VERSION, environment=specification), sort_keys=True).encode())
+
+    if specification.get("type") == "grid" and "path" in specification:
+        with open(_resolve(specification["path"], relative_to), "rb") as map_file:
+            digest.update(map_file.read())
+
+    return digest.hexdigest()
+
+def compile_environment(specification: dict, relative_to: Optional[os.PathLike]=None, cache_directory: Optional[os.PathLike]=None) -> Environment:
+    """Returns the compiled form of an environment: a `PackedEnvironment` for box and
+    composite environments, or a `GridEnvironment` with its signed distance field, loading
+    it from the on-disk cache when present and populating the cache otherwise.
+    """
+    cache_directory = get_scenario_cache_directory() if cache_directory is None else cache_directory
+    os.makedirs(cache_directory, exist_ok=True)
+    cache_path: os.PathLike = os.path.join(cache_directory, environment_key(specification, relative_to) + ".npz")
+    is_grid: bool = specification.get("type") == "grid"
+
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as archive:
+            arrays: Dict[str, ndarray] = dict(archive)
+        if is_grid:
+            return GridEnvironment(arrays["occupancy"], float(arrays["cell_size"]), arrays["origin"], arrays["sdf"])
+        return PackedEnvironment(**arrays)
+
+    environment: Environment = build_environment(specification, relative_to)
+    if is_grid:
+        compiled: Environment = environment
+        arrays = dict(occupancy=environment.occupancy, cell_size=np.array(environment.cell_size), origin=environment.origin, sdf=environment.sdf)
+    else:
+        compiled = environment.pack()
+        arrays = compiled.arrays
+
+    # -- write to a temporary file first so concurrent runs never observe a partial cache entry
+    temporary_path: os.PathLike = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as cache_file:
+        np.savez(cache_file, **arrays)
+    os.replace(temporary_path, cache_path)
+
+    return compiled
+
+def _coerce_parameter(parameters, name: str, value):
+    """Converts a scenario value to the type of the parameter it sets; the C controller's
+    ctypes fields reject, e.g., a float for an int field, and its fixed-size arrays bound
+    `num_sensors`.
+    """
+    current = getattr(parameters, name)
+    if isinstance(current, bool) or not isinstance(current, (int, float)):
+        return value
+    coerced = type(current)(value)
+    if coerced != value:
+        raise ValueError(f"parameter {name} expects {type(current).__name__}, got {value!r}")
+    if isinstance(parameters, CreatureC) and name == "num_sensors" and not (0 < coerced <= MAX_SENSORS):
+        raise ValueError(f"the C controller supports 1 to {MAX_SENSORS} sensors, got {value!r}")
+    return coerced
+
+def build_vehicle(specification: dict, use_c_controller: Optional[bool]=None) -> SimpleCar:
+    """Builds a vehicle from its scenario description; `use_c_controller`, if given, overrides the description's."""
+    use_c_controller = specification.get("use_c_controller", False) if use_c_controller is None else use_c_controller
+    vehicle: SimpleCar = SimpleCar(use_c_controller=use_c_controller)
+
+    if "position" in specification:
+        vehicle.position = np.array(specification["position"], dtype=float)
+    if "velocity" in specification:
+        vehicle.velocity = np.array(specification["velocity"], dtype=float)
+
+    # -- the C controller keeps its parameters in the ctypes struct
+    parameters = getattr(vehicle.controller, "c_controller", vehicle.controller)
+    for name, value in specification.get("controller", {}).items():
+        if not hasattr(parameters, name):
+            raise AttributeError(f"{vehicle.controller.__class__.__name__} has no parameter {name}")
+        setattr(parameters, name, _coerce_parameter(parameters, name, value))
+
+    return vehicle
+
+@dataclasses.dataclass
+class Scenario:
+    environment: Environment
+    vehicles: List[SimpleCar]
+    num_steps: int
+    seed: Optional[int] = None
+
+    def simulator(self, artifact_path: Optional[os.PathLike]=None, **kwargs) -> Simulator:
+        if self.seed is not None:
+            np.random.seed(self.seed)
+        return Simulator(self.environment, self.vehicles, artifact_path, **kwargs)
+
+def load_scenario(path: os.PathLike, use_cache: Optional[bool]=True, cache_directory: Optional[os.PathLike]=None, use_c_controller: Optional[bool]=None) -> Scenario:
+    """Reads a scenario file and compiles it into an environment and vehicles.
+
+    Parameters
+    ----------
+    path: os.PathLike
+        the scenario file; relative map paths inside it are resolved against its directory.
+    use_cache: bool
+        compile the environment through the on-disk geometry cache (the result is then a
+        `PackedEnvironment` or `GridEnvironment`); otherwise build it directly.
+    cache_directory: os.PathLike
+        optional override for the cache location (default: `scenario_cache` in the project directory).
+    use_c_controller: bool
+        optional override of every vehicle's `use_c_controller`.
+    """
+    specification: dict = read_scenario_file(path)
+    relative_to: os.PathLike = os.path.dirname(os.path.abspath(path))
+
+    if use_cache:
+        environment: Environment = compile_environment(specification["environment"], relative_to, cache_directory)
+    else:
+        environment = build_environment(specification["environment"], relative_to)
+
+    vehicles: List[SimpleCar] = [build_vehicle(vehicle, use_c_controller) for vehicle in specification.get("vehicles", [{}])]
+    return Scenario(environment=environment, vehicles=vehicles, num_steps=specification.get("num_steps", 500), seed=specification.get("seed"))
@@ -1,5 +1,5 @@
-from abc import ABC, abstractmethod
-from typing import Optional
+from abc import ABC, ABCMeta, abstractmethod
+from typing import List, Optional
 
 import numpy as np 
 import numpy.random as npr
@@ -30,37 +30,124 @@ class DistanceSensor(Sensor, ABC):
     def heading(self, new_heading: ndarray) -> None: 
         raise NotImplementedError
 
-class HCS04(DistanceSensor): 
+class SensorBank: 
+    """Array-backed storage for a collection of HCS04 sensors. 
+
+    Headings, (noiseless) values and noise scales for every sensor in the bank are 
+    stored as contiguous arrays, so that clamping, adding noise, and rotating headings 
+    are single vectorized operations rather than per-sensor Python calls. A single bank 
+    can be shared across many vehicles: each vehicle reserves a contiguous block of slots 
+    with `allocate`, and the `HCS04` objects it holds are lightweight views onto that block. 
+    """
     minimum_range: float = 0.02 # [m]
     maximum_range: float = 4    # [m]
     noise_scale: float = 0.     # [m]
+    out_of_range_value: float = 100. 
+
+    def __init__(self, num_sensors: Optional[int]=0) -> None: 
+        self.headings: ndarray = np.zeros((num_sensors, 2))
+        self.values: ndarray = np.zeros(num_sensors)
+        self.noise_scales: ndarray = np.full(num_sensors, self.noise_scale)
 
-    def __init__(self): 
-        self.reset()
+    def __len__(self) -> int: 
+        return self.values.size
+
+    def __repr__(self) -> str: 
+        return f"{self.__class__.__name__}(num_sensors={len(self)}, range=({self.minimum_range}, {self.maximum_range}))"
+
+    def allocate(self, num_sensors: int, noise_scale: Optional[float]=None) -> slice: 
+        """Reserves `num_sensors` new contiguous slots in the bank and returns the slice 
+        addressing them. 
+        """
+        start: int = len(self)
+        noise_scale = self.noise_scale if noise_scale is None else noise_scale
+
+        self.headings = np.concatenate((self.headings, np.zeros((num_sensors, 2))))
+        self.values = np.concatenate((self.values, np.zeros(num_sensors)))
+        self.noise_scales = np.concatenate((self.noise_scales, np.full(num_sensors, noise_scale)))
+        return slice(start, start + num_sensors)
+
+    def views(self, indices: Optional[slice]=slice(None)) -> List["HCS04"]: 
+        return [HCS04(bank=self, index=i) for i in range(len(self))[indices]]
+
+    def reset(self, indices: Optional[slice]=slice(None)) -> None: 
+        self.values[indices] = 0.
+        self.headings[indices] = 0.
+
+    def read(self, indices: Optional[slice]=slice(None)) -> ndarray: 
+        values: ndarray = self.values[indices]
+        return values + self.noise_scales[indices] * npr.randn(*values.shape)
+
+    def write(self, values: ndarray, indices: Optional[slice]=slice(None)) -> None: 
+        values = np.asarray(values, dtype=float)
+        self.values[indices] = np.where(values < self.minimum_range, 0., np.where(values > self.maximum_range, self.out_of_range_value, values))
+
+    def rotate(self, reference_headings: ndarray, rotations: ndarray, indices: Optional[slice]=slice(None)) -> None: 
+        """Sets sensor headings to `rotations[k] @ reference_headings[k]` for every 
+        sensor `k` addressed by `indices`; `reference_headings` may also be a single 
+        2-vector shared by every addressed sensor. 
+        """
+        self.headings[indices] = np.matmul(rotations, reference_headings[..., None])[..., 0]
+
+class _BankBacked(ABCMeta): 
+    # range and noise live in the SensorBank; assigning them on the sensor class would 
+    # silently replace the per-sensor properties without affecting any reading 
+    bank_attributes: tuple = ("minimum_range", "maximum_range", "noise_scale")
+
+    def __setattr__(cls, name: str, value) -> None: 
+        if name in cls.bank_attributes: 
+            raise AttributeError(f"{cls.__name__}.{name} is stored in the sensor bank: set SensorBank.{name} before sensors are allocated, or bank.noise_scales / sensor.noise_scale per sensor")
+        super().__setattr__(name, value)
+
+class HCS04(DistanceSensor, metaclass=_BankBacked): 
+    """A single HCS04 ultrasonic distance sensor, implemented as a view onto one slot 
+    of a `SensorBank` (a private single-slot bank is created if none is provided). 
+    Range and noise are configured on the bank, e.g. `SensorBank.noise_scale = 0.5` 
+    before the sensors are allocated. 
+    """
+    def __init__(self, bank: Optional[SensorBank]=None, index: Optional[int]=None): 
+        if bank is None: 
+            bank = SensorBank()
+            index = bank.allocate(1).start
+        self.bank: SensorBank = bank
+        self.index: int = index
 
     def __repr__(self) -> str: 
         return f"{self.__class__.__name__}(value={self._value}, noise_scale={self.noise_scale}, range=({self.minimum_range}, {self.maximum_range}))"
 
+    @property 
+    def minimum_range(self) -> float: 
+        return self.bank.minimum_range
+
+    @property 
+    def maximum_range(self) -> float: 
+        return self.bank.maximum_range
+
+    @property 
+    def noise_scale(self) -> float: 
+        return self.bank.noise_scales[self.index]
+
+    @noise_scale.setter 
+    def noise_scale(self, new_noise_scale: float) -> None: 
+        self.bank.noise_scales[self.index] = new_noise_scale
+
+    @property 
+    def _value(self) -> ndarray: 
+        return self.bank.values[self.index:self.index + 1]
+
     def reset(self) -> None: 
-        self._value: ndarray = np.zeros(1)
-        self._heading: ndarray = np.zeros(2)
+        self.bank.reset(slice(self.index, self.index + 1))
 
     @property 
     def heading(self) -> ndarray: 
-        return self._heading 
+        return self.bank.headings[self.index]
 
     @heading.setter 
     def heading(self, new_heading: ndarray) -> None: 
-        self._heading = new_heading
+        self.bank.headings[self.index] = new_heading
 
     def read(self) -> ndarray: 
-        noise: ndarray = self.noise_scale * npr.randn()
-        return self._value + noise
+        return self.bank.read(slice(self.index, self.index + 1))
 
     def write(self, value: ndarray) -> None: 
-        if (value < self.minimum_range): 
-            self._value = np.zeros(1)
-        elif (value > self.maximum_range): 
-            self._value = np.ones(1)*100#self.maximum_range
-        else: 
-            self._value = value
+        self.bank.write(value, slice(self.index, self.index + 1))
@@ -0,0 +1,78 @@
+import dataclasses
+from multiprocessing import shared_memory
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from environment import CompositeEnvironment, BoxEnvironment, PackedEnvironment
+from typedefs import ndarray
+from utils import attach_shared_memory
+
+@dataclasses.dataclass(frozen=True)
+class SharedEnvironmentHandle:
+    """A small, picklable description of a `PackedEnvironment` living in shared memory:
+    the name of the block and the (offset, shape) of each array within it.
+    """
+    name: str
+    layout: Tuple[Tuple[str, int, Tuple[int, ...]], ...]
+
+class SharedEnvironment:
+    """Exports the packed geometry of an environment to a single
+    `multiprocessing.shared_memory` block, so that it is built once per host and
+    every worker process attaches to it read-only without copying.
+
+    Example
+    -------
+        with SharedEnvironment(room) as shared:
+            with multiprocessing.Pool(initializer=worker_init, initargs=(shared.handle,)) as pool:
+                ...
+
+    where `worker_init` calls `SharedEnvironment.attach(handle)` and keeps the result.
+    """
+    def __init__(self, environment: Union[CompositeEnvironment, BoxEnvironment, PackedEnvironment]) -> None:
+        packed: PackedEnvironment = environment if isinstance(environment, PackedEnvironment) else environment.pack()
+        arrays: Dict[str, ndarray] = {name: np.ascontiguousarray(array, dtype=float) for name, array in packed.arrays.items()}
+
+        layout: list = []
+        offset: int = 0
+        for name, array in arrays.items():
+            layout.append((name, offset, array.shape))
+            offset += array.nbytes
+
+        self.shared_memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, offset, shape) in layout:
+            np.ndarray(shape, dtype=float, buffer=self.shared_memory.buf, offset=offset)[...] = arrays[name]
+
+        self.handle: SharedEnvironmentHandle = SharedEnvironmentHandle(name=self.shared_memory.name, layout=tuple(layout))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.handle.name}, size={self.shared_memory.size})"
+
+    def __enter__(self) -> "SharedEnvironment":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Releases and unlinks the shared block; call once, from the exporting process,
+        after every worker is done with it.
+        """
+        self.shared_memory.close()
+        self.shared_memory.unlink()
+
+    @staticmethod
+    def attach(handle: SharedEnvironmentHandle) -> PackedEnvironment:
+        """Returns a `PackedEnvironment` whose arrays are read-only views onto the
+        shared block described by `handle`.
+        """
+        block: shared_memory.SharedMemory = attach_shared_memory(handle.name)
+
+        arrays: Dict[str, ndarray] = {}
+        for (name, offset, shape) in handle.layout:
+            arrays[name] = np.ndarray(shape, dtype=float, buffer=block.buf, offset=offset)
+            arrays[name].flags.writeable = False
+
+        environment: PackedEnvironment = PackedEnvironment(**arrays)
+        environment.shared_memory = block # keep the mapping alive for as long as the environment
+        return environment
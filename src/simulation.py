@@ -1,5 +1,7 @@
+import asyncio
 import copy 
 import dataclasses
+import inspect
 import os 
 from typing import List, Optional, Sequence
 
@@ -9,6 +11,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 from environment import Environment
+from metrics import Metric
+from telemetry import TelemetryWriter
 from typedefs import ndarray
 from vehicle import Vehicle, SimpleCar
 
@@ -17,10 +21,13 @@ matplotlib.use("Agg")
 class Simulator: 
     step_duration: float = 0.100 # [s] 
 
-    def __init__(self, environment: Optional[Environment]=None, vehicles: Optional[Sequence[Vehicle]]=None, artifact_path: Optional[os.PathLike]=None) -> None: 
+    def __init__(self, environment: Optional[Environment]=None, vehicles: Optional[Sequence[Vehicle]]=None, artifact_path: Optional[os.PathLike]=None, metrics: Optional[Sequence[Metric]]=None, record_history: Optional[bool]=True, telemetry: Optional[TelemetryWriter]=None) -> None: 
         self.current_step: int = 0 
         self.environment = environment 
         self.artifact_path = artifact_path
+        self.metrics: Sequence[Metric] = [] if metrics is None else list(metrics)
+        self.record_history: bool = record_history
+        self.telemetry: Optional[TelemetryWriter] = telemetry
 
         if ((vehicles is not None) and (not isinstance(vehicles, list))): 
             self.vehicles = [vehicles]
@@ -29,6 +36,10 @@ class Simulator:
 
         self.prev_vehicle_velocities = [v.controller.prev_heading for v in self.vehicles]
 
+        if not record_history: 
+            for vehicle in self.vehicles: 
+                vehicle.controller.record_history = False
+
         self.prev_vehicle_wander_headings = []
         self.prev_vehicle_force_headings = []
 
@@ -36,6 +47,9 @@ class Simulator:
     def __repr__(self) -> str: 
         return f"{self.__class__.__name__}(environment={self.environment}, vehicles={self.vehicles})"
 
+    def summary(self) -> dict: 
+        return {metric.name: metric.summary() for metric in self.metrics}
+
     @property
     def current_time(self) -> float: 
         return self.step_duration * self.current_step
@@ -147,58 +161,108 @@ class Simulator:
         for vehicle in self.vehicles: 
             vehicle.reset()
 
+        self.prev_vehicle_velocities = [v.controller.prev_heading for v in self.vehicles]
+        self.prev_vehicle_wander_headings = []
+        self.prev_vehicle_force_headings = []
+        for metric in self.metrics: 
+            metric.reset()
+
     def simulate(self, num_steps: int, **kwargs) -> None: 
         for _ in range(num_steps): 
             self.step(**kwargs)
 
     def step(self, **kwargs) -> None:
-        rotation = np.array([[0, 1], [-1, 0]])
-
         for i, vehicle in enumerate(self.vehicles):
             if kwargs.get("save_artifacts", False): 
                 self.save_render_artifacts()
 
-            # move the vehicle based on its current velocity 
-            try: 
-                vehicle.position += vehicle.velocity * self.step_duration
-                print(f"vehicle position: {vehicle.position}")
-                if (not self.environment.inside(vehicle.position)): 
-                    raise ValueError
-            except ValueError: 
-                raise ValueError(f"Collision detected: tried to move vehicle to position: {vehicle.position}")
-
-            # take a distance measurement from this position 
-            distance_measurements = np.zeros(len(vehicle.sensors))
-
-            for j, sensor in enumerate(vehicle.sensors):
-                sensor_position: ndarray = vehicle.position 
-                sensor_heading: ndarray = sensor.heading
-                sensor_reading: ndarray = self.environment.distance_to_boundary(sensor_position, sensor_heading)
-                sensor.write(sensor_reading)
-                distance_measurements[j] = sensor.read()
-
-            # in Vehicle basis
-            # control_signal: ndarray = vehicle.controller(distance_measurements)
-            # if isinstance(control_signal, list): control_signal = np.array(control_signal)
-            # in world basis
+            distance_measurements: ndarray = self._sense(vehicle)
 
             # in Vehicle basis
             control_signal: ndarray = vehicle.controller(distance_measurements, self.current_time)
-            # in world basis
-            control_signal_world_basis = np.column_stack((rotation.dot(self.prev_vehicle_velocities[i]), self.prev_vehicle_velocities[i]))
-            control_signal = control_signal_world_basis.dot(control_signal)
 
-            # -- normalize and scale
-            control_signal = 0.1 * control_signal / (np.linalg.norm(control_signal) if np.any(control_signal != 0) else 1.0)
-            # -- update vehicle velocity to linear combination of previous and new velocity
-            vehicle.velocity = control_signal#(vehicle.velocity + control_signal) / 2
+            self._actuate(i, vehicle, distance_measurements, control_signal)
+
+        self.current_step += 1
+
+    def _sense(self, vehicle: Vehicle) -> ndarray: 
+        # move the vehicle based on its current velocity 
+        try: 
+            vehicle.position += vehicle.velocity * self.step_duration
+            print(f"vehicle position: {vehicle.position}")
+            if (not self.environment.inside(vehicle.position)): 
+                raise ValueError
+        except ValueError: 
+            raise ValueError(f"Collision detected: tried to move vehicle to position: {vehicle.position}")
+
+        # take a distance measurement from this position 
+        sensor_readings: ndarray = self.environment.distances_to_boundary(vehicle.position, vehicle.sensor_headings)
+        vehicle.write_sensors(sensor_readings)
+        return vehicle.read_sensors()
+
+    def _actuate(self, i: int, vehicle: Vehicle, distance_measurements: ndarray, control_signal: ndarray) -> None: 
+        rotation = np.array([[0, 1], [-1, 0]])
+
+        # in world basis
+        control_signal_world_basis = np.column_stack((rotation.dot(self.prev_vehicle_velocities[i]), self.prev_vehicle_velocities[i]))
+        control_signal = control_signal_world_basis.dot(control_signal)
+
+        # -- normalize and scale
+        control_signal = 0.1 * control_signal / (np.linalg.norm(control_signal) if np.any(control_signal != 0) else 1.0)
+        # -- update vehicle velocity to linear combination of previous and new velocity
+        vehicle.velocity = control_signal#(vehicle.velocity + control_signal) / 2
+
+        # -- record
+        if self.record_history: 
+            self.prev_vehicle_force_headings.append(control_signal_world_basis.dot(vehicle.controller.prev_force))
+            self.prev_vehicle_wander_headings.append(control_signal_world_basis.dot(vehicle.controller.prev_wander_force))
+
+        for metric in self.metrics: 
+            metric.update(i, vehicle, distance_measurements)
+
+        if self.telemetry is not None: 
+            self.telemetry.publish(self.current_step, self.current_time, i, vehicle)
+
+        # -- store
+        self.prev_vehicle_velocities[i] = vehicle.velocity / np.linalg.norm(vehicle.velocity) if np.any(vehicle.velocity != 0) else self.prev_vehicle_velocities[i]
+
 
-            # -- record
-            self.prev_vehicle_force_headings.append(control_signal_world_basis.dot(vehicle.controller.force_history[-1]))
-            self.prev_vehicle_wander_headings.append(control_signal_world_basis.dot(vehicle.controller.wander_history[-1]))
+class AsyncSimulator(Simulator): 
+    """A `Simulator` whose vehicles may have asynchronous controllers (e.g., `device.DeviceController`), 
+    whose calls return awaitables. Within each step, all vehicles move and sense, then their 
+    controller calls are awaited concurrently, so many vehicles interleave while waiting on 
+    controller I/O. 
 
-            # -- store
-            self.prev_vehicle_velocities[i] = vehicle.velocity / np.linalg.norm(vehicle.velocity) if np.any(vehicle.velocity != 0) else self.prev_vehicle_velocities[i]
+    Drive it with `simulate_async`/`step_async` from within the event loop in which the 
+    controllers were connected: their streams belong to that loop, so the synchronous 
+    `simulate`/`step` (which would each need a fresh loop) are not supported. 
+    """
+    async def step_async(self, **kwargs) -> None: 
+        if kwargs.get("save_artifacts", False): 
+            self.save_render_artifacts()
 
+        distance_measurements: List[ndarray] = [self._sense(vehicle) for vehicle in self.vehicles]
+        control_signals: List[ndarray] = await asyncio.gather(*[
+            self._control(vehicle, distances) for vehicle, distances in zip(self.vehicles, distance_measurements)
+        ])
+
+        for i, (vehicle, distances, control_signal) in enumerate(zip(self.vehicles, distance_measurements, control_signals)): 
+            self._actuate(i, vehicle, distances, control_signal)
 
         self.current_step += 1
+
+    async def _control(self, vehicle: Vehicle, distances: ndarray) -> ndarray: 
+        control_signal = vehicle.controller(distances, self.current_time)
+        if inspect.isawaitable(control_signal): 
+            control_signal = await control_signal
+        return control_signal
+
+    async def simulate_async(self, num_steps: int, **kwargs) -> None: 
+        for _ in range(num_steps): 
+            await self.step_async(**kwargs)
+
+    def simulate(self, num_steps: int, **kwargs) -> None: 
+        raise RuntimeError(f"{self.__class__.__name__} must be driven from the controllers' event loop; await simulate_async instead")
+
+    def step(self, **kwargs) -> None: 
+        raise RuntimeError(f"{self.__class__.__name__} must be driven from the controllers' event loop; await step_async instead")
@@ -0,0 +1,122 @@
+"""Per-step vehicle telemetry published through a shared-memory ring buffer.
+
+The block holds a small int64 header (records written, capacity, record size) followed
+by a (capacity, record size) float64 array of records. There is a single writer, which
+never blocks: it overwrites the oldest record and then bumps the write count. Readers
+poll the write count and copy out whatever they have not yet seen; a reader that falls
+more than `capacity` records behind simply skips ahead.
+"""
+import argparse
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from typedefs import namespace, ndarray
+from utils import attach_shared_memory
+
+FIELDS: tuple = (
+    "step", "time", "vehicle",
+    "position_x", "position_y",
+    "velocity_x", "velocity_y",
+    "avoid_force_x", "avoid_force_y",
+    "wander_x", "wander_y",
+)
+FIELD_INDEX: dict = {name: i for i, name in enumerate(FIELDS)}
+HEADER_SIZE: int = 3
+
+class TelemetryWriter:
+    def __init__(self, capacity: Optional[int]=4096, name: Optional[str]=None) -> None:
+        record_size: int = len(FIELDS)
+        self.shared_memory = shared_memory.SharedMemory(name=name, create=True, size=8 * (HEADER_SIZE + capacity * record_size))
+        self.header: ndarray = np.ndarray(HEADER_SIZE, dtype=np.int64, buffer=self.shared_memory.buf)
+        self.records: ndarray = np.ndarray((capacity, record_size), dtype=float, buffer=self.shared_memory.buf, offset=8 * HEADER_SIZE)
+        self.header[:] = (0, capacity, record_size)
+        self.capacity: int = capacity
+        self._record: ndarray = np.zeros(record_size)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name}, capacity={self.capacity}, written={self.header[0]})"
+
+    @property
+    def name(self) -> str:
+        return self.shared_memory.name
+
+    def publish(self, step: int, time: float, vehicle_index: int, vehicle) -> None:
+        record: ndarray = self._record
+        record[0:3] = (step, time, vehicle_index)
+        record[3:5] = vehicle.position
+        record[5:7] = vehicle.velocity
+        record[7:9] = vehicle.controller.prev_force
+        record[9:11] = vehicle.controller.prev_wander_force
+
+        count: int = int(self.header[0])
+        self.records[count % self.capacity] = record
+        self.header[0] = count + 1
+
+    def close(self) -> None:
+        self.shared_memory.close()
+        self.shared_memory.unlink()
+
+    def __getstate__(self) -> dict:
+        raise TypeError(f"{self.__class__.__name__} owns a shared memory block and cannot be copied; readers should attach by name")
+
+class TelemetryReader:
+    def __init__(self, name: str) -> None:
+        self.shared_memory = attach_shared_memory(name)
+        self.header: ndarray = np.ndarray(HEADER_SIZE, dtype=np.int64, buffer=self.shared_memory.buf)
+        capacity, record_size = int(self.header[1]), int(self.header[2])
+        self.records: ndarray = np.ndarray((capacity, record_size), dtype=float, buffer=self.shared_memory.buf, offset=8 * HEADER_SIZE)
+        self.capacity: int = capacity
+        self.read_count: int = 0
+
+    def poll(self) -> ndarray:
+        """Returns a (num_new, len(FIELDS)) array of the records written since the last poll."""
+        count: int = int(self.header[0])
+        start: int = max(self.read_count, count - self.capacity)
+        indices: ndarray = np.arange(start, count) % self.capacity
+        new_records: ndarray = self.records[indices].copy()
+
+        # -- drop anything the writer overwrote (or may be overwriting) while we were copying
+        overwritten: int = max(0, int(self.header[0]) + 1 - self.capacity - start)
+        self.read_count = count
+        return new_records[overwritten:]
+
+    def close(self) -> None:
+        self.shared_memory.close()
+
+parser = argparse.ArgumentParser()
+parser.add_argument("name", type=str)
+parser.add_argument("--interval", type=float, default=0.1)
+parser.add_argument("--history", type=int, default=2000)
+
+def main(args: namespace):
+    import matplotlib.pyplot as plt
+
+    reader: TelemetryReader = TelemetryReader(args.name)
+    figure, (ax_env, ax_force) = plt.subplots(nrows=1, ncols=2)
+    trajectory = ax_env.scatter([], [], s=4)
+    force_line, = ax_force.plot([], [])
+    ax_env.set_title("Robot position")
+    ax_force.set_title("Repulsive force magnitude")
+
+    window: ndarray = np.zeros((0, len(FIELDS)))
+    try:
+        while plt.fignum_exists(figure.number):
+            window = np.concatenate((window, reader.poll()))[-args.history:]
+            if window.size:
+                trajectory.set_offsets(window[:, [FIELD_INDEX["position_x"], FIELD_INDEX["position_y"]]])
+                trajectory.set_array(window[:, FIELD_INDEX["vehicle"]])
+                force_line.set_data(window[:, FIELD_INDEX["time"]], np.linalg.norm(window[:, [FIELD_INDEX["avoid_force_x"], FIELD_INDEX["avoid_force_y"]]], axis=1))
+                for ax in (ax_env, ax_force):
+                    ax.relim()
+                    ax.autoscale_view()
+                ax_env.update_datalim(trajectory.get_offsets())
+                ax_env.autoscale_view()
+            plt.pause(args.interval)
+    finally:
+        reader.close()
+
+if __name__=="__main__":
+    args = parser.parse_args()
+    main(args)
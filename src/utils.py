@@ -1,5 +1,7 @@
 import datetime
 import functools
+import inspect
+from multiprocessing import shared_memory
 import os 
 
 SOURCE_DIRECTORY: os.PathLike = os.path.dirname(os.path.abspath(__file__))
@@ -34,3 +36,9 @@ def setup_experiment_directory(name: str) -> os.PathLike:
     os.mkdir(directory)
 
     return directory
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory: 
+    # the creating process owns the block; attaching processes must not unlink it when they exit
+    if "track" in inspect.signature(shared_memory.SharedMemory).parameters: 
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
@@ -0,0 +1,176 @@
+"""Gym-style vectorized episodic interface on top of `Simulator`.
+
+`VectorEnvironment` steps `num_envs` independent episodes in lockstep, one `SimpleCar` per
+episode, with all vehicle state held in one `VehiclePool`. Finished episodes, whether they
+collided or reached `max_steps`, are reset in place: their pool rows, sensor slots and
+controller state are reinitialized, and no objects are rebuilt. Observations, rewards and
+done flags are written into preallocated arrays, which are reused on every step.
+"""
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from environment import Environment
+from metrics import Metric
+from simulation import Simulator
+from typedefs import ndarray
+from vehicle import SimpleCar, VehiclePool
+
+def default_reward(speeds: ndarray, collided: ndarray, step_duration: float) -> ndarray:
+    """Distance travelled this step, with a unit penalty for colliding."""
+    return speeds * step_duration - collided.astype(float)
+
+class VectorEnvironment:
+    """Parameters
+    ----------
+    environment: Environment
+        the world shared by every episode (a `PackedEnvironment` or `GridEnvironment` is fastest).
+    num_envs: int
+        number of episodes stepped in lockstep.
+    max_steps: int
+        episodes are truncated (and reset) after this many steps.
+    use_c_controller: bool
+        use `CreatureCInterface` rather than `Creature` for every vehicle.
+    start_sampler: callable
+        optional `(rng, count) -> (count, 2)` array of start positions for new episodes (default: the origin).
+    reward_function: callable
+        optional `(speeds, collided, step_duration) -> (num_envs,)` rewards (default: `default_reward`).
+    seed: int
+        seed for the start-position generator and numpy's global generator (used by the controllers).
+    metrics: Sequence[Metric]
+        optional streaming metrics, updated with every surviving episode on every step (see `summary`).
+    """
+    rotation: ndarray = np.array([[0, 1], [-1, 0]])
+    speed: float = 0.1 # [m/s]
+
+    def __init__(self, environment: Environment, num_envs: int, max_steps: Optional[int]=500, use_c_controller: Optional[bool]=False,
+                 start_sampler: Optional[Callable[[np.random.Generator, int], ndarray]]=None,
+                 reward_function: Optional[Callable[[ndarray, ndarray, float], ndarray]]=None, seed: Optional[int]=None,
+                 metrics: Optional[Sequence[Metric]]=None) -> None:
+        self.num_envs: int = num_envs
+        self.max_steps: int = max_steps
+        self.start_sampler = start_sampler
+        self.reward_function = default_reward if reward_function is None else reward_function
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+        if seed is not None:
+            np.random.seed(seed)
+
+        self.pool: VehiclePool = VehiclePool(capacity=num_envs)
+        self.vehicles: List[SimpleCar] = self.pool.create(num_envs, use_c_controller)
+        for vehicle in self.vehicles:
+            vehicle.controller.record_history = False
+        self.simulator: Simulator = Simulator(environment, self.vehicles, metrics=metrics, record_history=False)
+        self.step_duration: float = self.simulator.step_duration
+
+        # -- preallocated buffers
+        num_sensors: int = self.pool.num_sensors
+        self.sensor_indices: ndarray = self.pool.sensor_indices
+        self.observations: ndarray = np.zeros((num_envs, num_sensors))
+        self.final_observations: ndarray = np.zeros((num_envs, num_sensors))
+        self.rewards: ndarray = np.zeros(num_envs)
+        self.collided: ndarray = np.zeros(num_envs, dtype=bool)
+        self.truncated: ndarray = np.zeros(num_envs, dtype=bool)
+        self.dones: ndarray = np.zeros(num_envs, dtype=bool)
+        self.episode_steps: np.ndarray = np.zeros(num_envs, dtype=int)
+        self.prev_velocities: ndarray = np.zeros((num_envs, 2))
+        self.control_signals: ndarray = np.zeros((num_envs, 2))
+        self._readings: ndarray = np.zeros((num_envs, num_sensors))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(num_envs={self.num_envs}, max_steps={self.max_steps}, environment={self.simulator.environment})"
+
+    def summary(self) -> dict: 
+        return self.simulator.summary()
+
+    def _start_positions(self, count: int) -> Optional[ndarray]:
+        return None if self.start_sampler is None else self.start_sampler(self.rng, count)
+
+    def _reset_rows(self, rows: ndarray) -> None:
+        indices: ndarray = np.flatnonzero(rows)
+        if indices.size == 0:
+            return
+
+        self.pool.reset(indices, self._start_positions(indices.size))
+        for index in indices:
+            self.vehicles[index].controller.reset()
+            self.prev_velocities[index] = self.vehicles[index].controller.prev_heading
+        self.episode_steps[indices] = 0
+
+    def _sense(self, rows: ndarray) -> None:
+        environment: Environment = self.simulator.environment
+        sensor_headings: ndarray = self.pool.sensor_bank.headings[self.sensor_indices]
+        for index in np.flatnonzero(rows):
+            self._readings[index] = environment.distances_to_boundary(self.pool.positions[index], sensor_headings[index])
+
+        sensor_indices: ndarray = self.sensor_indices[rows]
+        self.pool.sensor_bank.write(self._readings[rows], sensor_indices)
+        self.observations[rows] = self.pool.sensor_bank.read(sensor_indices)
+
+    def reset(self) -> ndarray:
+        """Resets every episode; returns the (num_envs, num_sensors) initial observations."""
+        everything: ndarray = np.ones(self.num_envs, dtype=bool)
+        self._reset_rows(everything)
+        self._sense(everything)
+        return self.observations
+
+    def step(self) -> Tuple[ndarray, ndarray, ndarray, dict]:
+        """Advances every episode by one step.
+
+        Returns
+        -------
+        observations: ndarray
+            (num_envs, num_sensors) distance readings; for episodes that finished this step,
+            the first observation of the new episode (the last one, sensed where the episode
+            collided or was truncated, is in `info["final_observation"]`).
+        rewards: ndarray
+            (num_envs,) rewards for this step.
+        dones: ndarray
+            (num_envs,) whether each episode finished (collided or truncated) this step.
+        info: dict
+            `collided` and `truncated` masks, and `final_observation`.
+        """
+        positions: ndarray = self.pool.positions
+
+        # -- move, and detect collisions without raising
+        positions += self.pool.velocities * self.step_duration
+        np.logical_not(self.simulator.environment.inside_points(positions), out=self.collided)
+        active: ndarray = ~self.collided
+
+        # -- sense and control the surviving episodes
+        self._sense(active)
+        times: ndarray = self.episode_steps * self.step_duration
+        for index in np.flatnonzero(active):
+            self.control_signals[index] = self.vehicles[index].controller(self.observations[index], times[index])
+
+        # -- controller output (vehicle basis) to world basis, normalize and scale
+        prev: ndarray = self.prev_velocities
+        world: ndarray = self.control_signals[:, :1] * (prev @ self.rotation.T) + self.control_signals[:, 1:] * prev
+        norms: ndarray = np.linalg.norm(world, axis=1)
+        world *= np.divide(self.speed, norms, out=np.zeros_like(norms), where=(norms > 0.) & active)[:, None]
+        self.pool.set_velocities(world)
+
+        moving: ndarray = np.linalg.norm(world, axis=1) > 0.
+        self.prev_velocities[moving] = world[moving] / self.speed
+
+        # -- rewards and episode bookkeeping
+        self.rewards[:] = self.reward_function(np.linalg.norm(world, axis=1), self.collided, self.step_duration)
+        self.episode_steps += 1
+        np.logical_and(active, self.episode_steps >= self.max_steps, out=self.truncated)
+        np.logical_or(self.collided, self.truncated, out=self.dones)
+
+        for metric in self.simulator.metrics:
+            for index in np.flatnonzero(active):
+                metric.update(int(index), self.vehicles[index], self.observations[index])
+
+        # -- collided episodes were not sensed above; their final observation is taken where they collided
+        if np.any(self.collided):
+            self._sense(self.collided)
+
+        # -- auto-reset finished episodes in place
+        self.final_observations[self.dones] = self.observations[self.dones]
+        if np.any(self.dones):
+            self._reset_rows(self.dones)
+            self._sense(self.dones)
+
+        info: dict = dict(collided=self.collided, truncated=self.truncated, final_observation=self.final_observations)
+        return self.observations, self.rewards, self.dones, info
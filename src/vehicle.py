@@ -1,14 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Sequence
+import math
+from typing import List, Optional, Sequence
 
 import matplotlib.pyplot as plt 
 import numpy as np 
 
 from control import HCS04Controller, AvoidingController, Creature, CreatureCInterface
-from sensor import Sensor, HCS04
+from sensor import Sensor, SensorBank
 from typedefs import ndarray 
 
 class Vehicle(ABC): 
+    __slots__ = ()
+
     @property
     @abstractmethod 
     def position(self) -> ndarray: 
@@ -33,16 +36,131 @@ class Vehicle(ABC):
     def draw(self, ax) -> None: 
         raise NotImplementedError
 
-class SimpleCar(Vehicle): 
-    def __init__(self, use_c_controller: Optional[bool]=False) -> None: 
-        # private 
-        self._position: ndarray = np.zeros(2)
-        self._velocity: ndarray = np.zeros(2)
-        self._heading: ndarray = np.array([0., 1.])
+def _sensor_rotations(per_sensor_rotation: ndarray, num_sensors: int) -> ndarray: 
+    """(num_sensors, 2, 2) rotations from the vehicle heading to each sensor heading: the 
+    k-th sensor is rotated by `per_sensor_rotation` applied k times. 
+    """
+    return np.stack([np.linalg.matrix_power(per_sensor_rotation, k) for k in range(num_sensors)])
+
+class VehiclePool: 
+    """Contiguous storage for the state of many `SimpleCar`s. 
+
+    Positions, velocities and headings live in (capacity, 2) arrays (of which the first 
+    `len(pool)` rows are in use), and all sensors live in a single `SensorBank`. Each 
+    `SimpleCar` is a lightweight view onto one row, so bulk updates can go straight to 
+    the arrays (e.g., `pool.set_velocities(...)`) without touching the vehicle objects. 
+    """
+    num_sensors: int = 4
+    per_sensor_rotation: np.ndarray = np.array([[0, 1], [-1, 0]])
+    sensor_rotations: np.ndarray = _sensor_rotations(per_sensor_rotation, num_sensors)
+
+    def __init__(self, capacity: Optional[int]=1, sensor_bank: Optional[SensorBank]=None) -> None: 
+        self.size: int = 0 
+        self._positions: ndarray = np.zeros((capacity, 2))
+        self._velocities: ndarray = np.zeros((capacity, 2))
+        self._headings: ndarray = np.zeros((capacity, 2))
+        self._sensor_offsets: ndarray = np.zeros(capacity, dtype=int)
+        self.sensor_bank: SensorBank = SensorBank() if sensor_bank is None else sensor_bank
+
+    def __len__(self) -> int: 
+        return self.size 
+
+    def __repr__(self) -> str: 
+        return f"{self.__class__.__name__}(size={self.size}, capacity={self._positions.shape[0]})"
+
+    @property 
+    def positions(self) -> ndarray: 
+        return self._positions[:self.size]
+
+    @property 
+    def velocities(self) -> ndarray: 
+        return self._velocities[:self.size]
 
-        # publice: sensor/control suite 
-        self.sensors: Sequence[Sensor] = [HCS04() for i in range(4)]
-        self.per_sensor_rotation: np.ndarray = np.array([[0, 1], [-1, 0]])
+    @property 
+    def headings(self) -> ndarray: 
+        return self._headings[:self.size]
+
+    @property 
+    def sensor_indices(self) -> ndarray: 
+        """(size, num_sensors) array of each vehicle's rows in the sensor bank."""
+        return self._sensor_offsets[:self.size, None] + np.arange(self.num_sensors)
+
+    def allocate(self, num_vehicles: int) -> slice: 
+        """Reserves `num_vehicles` rows (growing the arrays geometrically if needed), with 
+        default state and a contiguous block of sensors for each, and returns their slice. 
+        """
+        start: int = self.size 
+        stop: int = start + num_vehicles
+
+        if stop > self._positions.shape[0]: 
+            capacity: int = max(stop, 2 * self._positions.shape[0])
+            for name in ("_positions", "_velocities", "_headings", "_sensor_offsets"): 
+                old: ndarray = getattr(self, name)
+                new: ndarray = np.zeros((capacity, *old.shape[1:]), dtype=old.dtype)
+                new[:start] = old[:start]
+                setattr(self, name, new)
+
+        sensors: slice = self.sensor_bank.allocate(self.num_sensors * num_vehicles)
+        self._positions[start:stop] = 0.
+        self._velocities[start:stop] = 0.
+        self._headings[start:stop] = (0., 1.)
+        self._sensor_offsets[start:stop] = sensors.start + self.num_sensors * np.arange(num_vehicles)
+        self.size = stop
+
+        rows: slice = slice(start, stop)
+        self.configure_sensors(rows)
+        return rows
+
+    def create(self, num_vehicles: int, use_c_controller: Optional[bool]=False) -> List["SimpleCar"]: 
+        rows: slice = self.allocate(num_vehicles)
+        return [SimpleCar(use_c_controller, pool=self, index=index) for index in range(rows.start, rows.stop)]
+
+    def configure_sensors(self, rows: Optional[slice]=slice(None)) -> None: 
+        headings: ndarray = self.headings[rows]
+        sensor_headings: ndarray = np.einsum("kij,nj->nki", self.sensor_rotations, headings)
+        self.sensor_bank.headings[self.sensor_indices[rows]] = sensor_headings
+
+    def reset(self, rows: Optional[slice]=slice(None), positions: Optional[ndarray]=None) -> None: 
+        """Restores the vehicles in `rows` (a slice, index array or boolean mask) to their initial 
+        state in place, optionally placing them at `positions`. Controllers are not reset. 
+        """
+        self.positions[rows] = 0. if positions is None else positions
+        self.velocities[rows] = 0.
+        self.headings[rows] = (0., 1.)
+
+        sensor_indices: ndarray = self.sensor_indices[rows]
+        self.sensor_bank.values[sensor_indices] = 0.
+        self.configure_sensors(rows)
+
+    def set_velocities(self, velocities: ndarray, rows: Optional[slice]=slice(None)) -> None: 
+        """Bulk equivalent of assigning `SimpleCar.velocity` for every vehicle in `rows` (a slice, 
+        index array or boolean mask). 
+        """ 
+        self.velocities[rows] = velocities
+        velocities = self.velocities[rows]
+        speeds: ndarray = np.linalg.norm(velocities, axis=1, keepdims=True)
+
+        # -- write back through `rows` (indexing with an array or mask yields a copy) 
+        self.headings[rows] = np.where(speeds > 0., velocities / np.where(speeds > 0., speeds, 1.), self.headings[rows])
+        self.configure_sensors(rows)
+
+
+class SimpleCar(Vehicle): 
+    __slots__ = ("pool", "index", "controller", "_sensors")
+
+    num_sensors: int = VehiclePool.num_sensors
+    per_sensor_rotation: np.ndarray = VehiclePool.per_sensor_rotation
+    sensor_rotations: np.ndarray = VehiclePool.sensor_rotations
+
+    def __init__(self, use_c_controller: Optional[bool]=False, sensor_bank: Optional[SensorBank]=None, pool: Optional[VehiclePool]=None, index: Optional[int]=None) -> None: 
+        # state lives in a row of a (possibly private) vehicle pool 
+        if pool is None: 
+            pool = VehiclePool(sensor_bank=sensor_bank)
+        if index is None: 
+            index = pool.allocate(1).start
+        self.pool: VehiclePool = pool 
+        self.index: int = index 
+        self._sensors: Optional[List[Sensor]] = None
 
         if use_c_controller: 
             self.controller: HCS04Controller = CreatureCInterface()
@@ -52,47 +170,76 @@ class SimpleCar(Vehicle):
         self.configure_sensors()
         self.configure_controller()
 
+    def __repr__(self) -> str: 
+        return f"{self.__class__.__name__}(index={self.index}, position={self.position}, velocity={self.velocity})"
+
     def reset(self) -> None: 
-        self._position: ndarray = np.zeros(2)
-        self._velocity: ndarray = np.zeros(2)
-        self._heading: ndarray = np.zeros(2)
+        self.pool.reset(slice(self.index, self.index + 1))
         self.controller.reset()
-        self.sensors.reset()
+
+    @property 
+    def sensor_bank(self) -> SensorBank: 
+        return self.pool.sensor_bank
+
+    @property 
+    def sensor_slots(self) -> slice: 
+        start: int = int(self.pool._sensor_offsets[self.index])
+        return slice(start, start + self.num_sensors)
+
+    @property 
+    def sensors(self) -> Sequence[Sensor]: 
+        """Per-sensor `HCS04` views, built on first access; bulk code should prefer 
+        `sensor_headings`, `write_sensors` and `read_sensors`, which go straight to the bank. 
+        """
+        if self._sensors is None: 
+            self._sensors = self.sensor_bank.views(self.sensor_slots)
+        return self._sensors
 
     @property 
     def position(self) -> ndarray: 
-        return self._position
+        return self.pool._positions[self.index]
 
     @property 
     def velocity(self) -> ndarray: 
-        return self._velocity 
+        return self.pool._velocities[self.index]
+
+    @property 
+    def heading(self) -> ndarray: 
+        return self.pool._headings[self.index]
 
     @position.setter
     def position(self, new_position: ndarray) -> None: 
-        self._position = new_position 
+        self.pool._positions[self.index] = new_position 
 
     @velocity.setter 
     def velocity(self, new_velocity: ndarray) -> ndarray: 
-        self._velocity = new_velocity 
+        self.pool._velocities[self.index] = new_velocity 
 
-        if np.linalg.norm(new_velocity): 
-            self._heading = new_velocity / np.linalg.norm(new_velocity)
+        speed: float = math.hypot(new_velocity[0], new_velocity[1])
+        if speed: 
+            self.pool._headings[self.index] = new_velocity / speed
             # TODO generalize to multiple sensors to have distince (but relative fixed) headers
 
             self.configure_sensors()
 
     def configure_sensors(self) -> None: 
         # TODO generalize to multiple sensors to have distince (but relative fixed) headers
-        next_sensor_heading = self._heading
-        for i, sensor in enumerate(self.sensors):
-            sensor.heading = next_sensor_heading
-            next_sensor_heading = self.per_sensor_rotation @ next_sensor_heading
+        self.sensor_bank.rotate(self.heading, self.sensor_rotations, self.sensor_slots)
+
+    @property 
+    def sensor_headings(self) -> ndarray: 
+        return self.sensor_bank.headings[self.sensor_slots]
+
+    def write_sensors(self, values: ndarray) -> None: 
+        self.sensor_bank.write(values, self.sensor_slots)
 
+    def read_sensors(self) -> ndarray: 
+        return self.sensor_bank.read(self.sensor_slots)
 
     def configure_controller(self) -> None: 
-        self.controller.register_headings(np.array([sensor.heading for sensor in self.sensors]))
+        self.controller.register_headings(self.sensor_headings.copy())
 
     def draw(self, ax) -> None: 
         ax.scatter(self.position[0], self.position[1], marker="o", s=100)
-        ax.arrow(self.position[0], self.position[1], self._heading[0] / 5., self._heading[1] / 5., width=0.02, color='k')
-        ax.arrow(self.position[0], self.position[1], self.velocity[0], self.velocity[1], width=0.02, color='tab:red')
\ No newline at end of file
+        ax.arrow(self.position[0], self.position[1], self.heading[0] / 5., self.heading[1] / 5., width=0.02, color='k')
+        ax.arrow(self.position[0], self.position[1], self.velocity[0], self.velocity[1], width=0.02, color='tab:red')